@@ -0,0 +1,205 @@
+import mmap
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, TypeVar
+
+import numpy as np
+
+from igi2cs.content_manager import ContentManager
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mef import MefModel
+from igi2cs.res import ResArchive, normalize_res_name
+from igi2cs.tex import TexTexture
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    bytes_used: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    value: Any
+    size: int
+    # Archive the value was decoded from, a refreshed archive makes the entry stale.
+    archive: Optional[ResArchive]
+
+
+def _payload_owner(value) -> Any:
+    while True:
+        if isinstance(value, np.ndarray) and value.base is not None:
+            value = value.base
+        elif isinstance(value, memoryview):
+            value = value.obj
+        else:
+            return value
+
+
+def estimate_nbytes(value) -> int:
+    """Approximates the memory held by a decoded asset.
+
+    Array and buffer payloads are counted once per underlying allocation, so views sharing memory are not
+    counted twice, and payloads backed by memory-mapped files are not counted at all. Python objects add
+    their sys.getsizeof overhead.
+    """
+    seen: set[int] = set()
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, (np.ndarray, memoryview)):
+            owner = _payload_owner(item)
+            if id(owner) not in seen:
+                seen.add(id(owner))
+                if isinstance(owner, np.ndarray):
+                    total += owner.nbytes
+                elif isinstance(owner, (bytes, bytearray)):
+                    total += len(owner)
+                elif not isinstance(owner, mmap.mmap):
+                    total += memoryview(owner).nbytes
+            if isinstance(item, np.ndarray) and item.dtype.hasobject:
+                stack.extend(item.ravel())
+            continue
+        if isinstance(item, (bytes, bytearray)):
+            total += len(item)
+            continue
+        if isinstance(item, (type, Enum, mmap.mmap)) or callable(item):
+            continue
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+        else:
+            if hasattr(item, "__dict__"):
+                stack.extend(vars(item).values())
+            for cls in type(item).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    attribute = getattr(item, name, None)
+                    if attribute is not None:
+                        stack.append(attribute)
+    return total
+
+
+class AssetCache:
+    """Least recently used cache of decoded assets with a byte budget.
+
+    Values are keyed by RES archive path and entry name, their size is measured with estimate_nbytes
+    when they are stored. Storing a value evicts least recently used entries until the cache fits in
+    `max_bytes` again; values larger than the whole budget are returned without being cached. Entries
+    decoded from an archive that was since replaced by ContentManager.refresh count as misses.
+
+    Loads run outside the lock, two threads missing the same key at once may both decode it.
+    """
+
+    def __init__(self, content_manager: ContentManager, max_bytes: int = 256 * 1024 * 1024):
+        self._content_manager = content_manager
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, _CacheEntry] = OrderedDict()
+        self._bytes_used = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, len(self._entries), self._bytes_used)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, archive: Optional[ResArchive] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.archive is not archive:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry.value
+
+    def put(self, key: Hashable, value: Any, archive: Optional[ResArchive] = None, size: Optional[int] = None):
+        size = estimate_nbytes(value) if size is None else size
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes_used -= old.size
+            if size > self.max_bytes:
+                return
+            while self._entries and self._bytes_used + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes_used -= evicted.size
+                self._evictions += 1
+            self._entries[key] = _CacheEntry(value, size, archive)
+            self._bytes_used += size
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], T], archive: Optional[ResArchive] = None) -> T:
+        value = self.get(key, archive)
+        if value is None:
+            value = loader()
+            self.put(key, value, archive)
+        return value
+
+    def invalidate(self, res_path: Optional[Path] = None):
+        """Drops all entries, or only the ones decoded from `res_path`."""
+        with self._lock:
+            if res_path is None:
+                self._entries.clear()
+                self._bytes_used = 0
+                return
+            # Keys of entries loaded through this class are (res_path, name, kind) tuples, other keys are kept.
+            for key in [key for key in self._entries if isinstance(key, tuple) and key and key[0] == res_path]:
+                self._bytes_used -= self._entries.pop(key).size
+
+    def reset_stats(self):
+        with self._lock:
+            self._hits = self._misses = self._evictions = 0
+
+    def _load_entry(self, res_path: Path, name: str, kind: str, decode: Callable[[MemoryBuffer], T]) -> T:
+        archive = self._content_manager.get_archive(res_path)
+        if archive is None:
+            raise KeyError(f"{res_path} is not a known RES archive")
+        name = normalize_res_name(name)
+
+        def load() -> T:
+            entry = archive.get_entry(name)
+            if entry is None:
+                raise KeyError(f"{name!r} not found in {res_path}")
+            return decode(entry.open())
+
+        return self.get_or_load((res_path, name, kind), load, archive)
+
+    def model(self, res_path: Path, name: str) -> MefModel:
+        return self._load_entry(res_path, name, "mef", MefModel)
+
+    def texture(self, res_path: Path, name: str) -> TexTexture:
+        return self._load_entry(res_path, name, "tex", TexTexture)
+
+    def rgba(self, res_path: Path, name: str) -> bytes:
+        """RGBA pixels of a texture, the decoded TexTexture is cached as well."""
+        return self._load_entry(res_path, name, "rgba",
+                                lambda _: self.texture(res_path, name).convert_to_rgba())
@@ -0,0 +1,104 @@
+"""Generators for the synthetic inputs of the benchmarks."""
+import os
+import random
+import struct
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from igi2cs.file_utils import FileBuffer, WritableMemoryBuffer
+from igi2cs.loop_file import LoopFileWriter
+
+
+def make_res(path: Union[str, Path], entries: int, body_size: int) -> Path:
+    """IRES archive with `entries` NAME/BODY pairs, written with plain struct packing."""
+    path = Path(path)
+    with open(path, "wb") as f:
+        f.write(b"ILFF" + struct.pack("<3I", 0, 4, 0) + b"IRES")
+        for i in range(entries):
+            for ident, data in ((b"NAME", b"LOCAL:file%d.bin\x00" % i), (b"BODY", bytes([i % 251]) * body_size)):
+                f.write(ident + struct.pack("<3I", len(data), 4, 0) + data)
+                f.write(b"\x00" * (-f.tell() % 4))
+    return path
+
+
+def _form_chunk(ident: bytes, payload: bytes) -> bytes:
+    return ident + struct.pack(">I", len(payload)) + payload + b"\x00" * (-len(payload) % 4)
+
+
+def _names(prefix: bytes, count: int) -> bytes:
+    return struct.pack("<I", count) + b"".join(b"%s_%06d\x00" % (prefix, i) for i in range(count))
+
+
+def make_mtp(models: int = 20000, textures: int = 20000, names: int = 20000, seed: int = 0) -> bytes:
+    """MTP with one instance of every model using 1 to 5 random textures."""
+    rnd = random.Random(seed)
+    instances = []
+    for model in range(models):
+        ids = [rnd.randrange(textures) for _ in range(rnd.randrange(1, 6))]
+        instances.append(struct.pack(f"<2I{len(ids)}I", model, len(ids), *ids))
+    texture_info = struct.pack("<I", textures) + b"".join(struct.pack("<Ii", i, 0) for i in range(textures))
+    value_names = struct.pack("<I", 10) + struct.pack("<10I", *range(10)) + b"".join(b"v%d\x00" % i for i in range(10))
+    body = (b"MTP " + _form_chunk(b"BANM", _names(b"anim", names)) + _form_chunk(b"SNDS", _names(b"snd", names))
+            + _form_chunk(b"SVOL", _names(b"vol", names)) + _form_chunk(b"MODS", _names(b"model", models))
+            + _form_chunk(b"VNAM", value_names) + _form_chunk(b"INST", b"".join(instances))
+            + _form_chunk(b"TEXF", _names(b"tex", textures)) + _form_chunk(b"PALF", b"\x00" * 4)
+            + _form_chunk(b"GTT ", texture_info))
+    return b"FORM" + struct.pack(">I", len(body)) + body
+
+
+def make_tree(root: Union[str, Path], levels: int = 20, models: int = 2000, textures: int = 1500,
+              archives: int = 3, entries: int = 2000) -> Path:
+    """Game-like install: per level an objects/level.mtp and `archives` RES files of small .mef entries."""
+    root = Path(root)
+    rnd = random.Random(0)
+    for level in range(levels):
+        directory = root / f"level{level}"
+        (directory / "objects").mkdir(parents=True, exist_ok=True)
+        (directory / "objects" / "level.mtp").write_bytes(make_mtp(models, textures, 200, seed=level))
+        for archive in range(archives):
+            with FileBuffer(directory / f"pack{archive}.res", "wb") as f, LoopFileWriter(f, "IRES") as writer:
+                for entry in range(entries):
+                    writer.write_chunk("NAME", b"LOCAL:objects/model_%06d.mef\x00" % (archive * entries + entry))
+                    writer.write_chunk("BODY", rnd.randbytes(64))
+    return root
+
+
+def cached(path: Path, make, *args, **kwargs) -> Path:
+    """Runs `make(path, ...)` unless `path` already exists."""
+    if not os.path.exists(path):
+        make(path, *args, **kwargs)
+    return path
+
+
+def make_tex(width: int, height: int, mode: int = 3, bytes_per_pixel: int = 4, mips: bool = False,
+             seed: Optional[int] = None) -> bytes:
+    """LOOP texture, random pixels when `seed` is given, otherwise every mip level filled with its number."""
+    levels = [(width, height)]
+    while mips and levels[-1][0] > 1 and levels[-1][1] > 1:
+        levels.append((levels[-1][0] >> 1, levels[-1][1] >> 1))
+    if seed is not None:
+        size = sum(w * h for w, h in levels) * bytes_per_pixel
+        pixels = np.random.default_rng(seed).integers(0, 255, size, dtype=np.uint8).tobytes()
+    else:
+        pixels = b"".join(bytes([level]) * (w * h * bytes_per_pixel) for level, (w, h) in enumerate(levels))
+    header = struct.pack("<4I6H", 2, mode | (0x40 if mips else 0), 0, 0, 1, width, height, width, height,
+                         bytes_per_pixel)
+    return b"LOOP" + header + pixels
+
+
+def make_mef(textures: int, faces: int = 2000, vertices: int = 3000, groups: int = 8) -> bytes:
+    """Static MEF with one render mesh whose face groups use texture slots 0 to `textures` - 1."""
+    buffer = WritableMemoryBuffer()
+    with LoopFileWriter(buffer, "MEF ", flip_ident=True) as writer:
+        writer.write_chunk("MESH", struct.pack("<f7II3i12f3I3If6H10I", 1.0, 2000, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0,
+                                               *([0.0] * 12), faces, vertices, 0, 0, 0, 0, 0.0, 0, 0, 0, 0, 0, 0,
+                                               *([0] * 10)))
+        writer.write_chunk("RD3D", struct.pack("<9I", 0, faces, groups, vertices, 0, 0, 0, 0, 0))
+        writer.write_chunk("FACE", np.zeros(faces * 3, np.uint16))
+        writer.write_chunk("REND", b"".join(struct.pack("<4B3f4H3h2B", 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                                                        group % textures, (group + 1) % textures, -1, 0, 0)
+                                            for group in range(groups)))
+        writer.write_chunk("VRTX", np.zeros(vertices * 8, np.float32))
+    return bytes(buffer.data)
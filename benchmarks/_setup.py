@@ -0,0 +1,24 @@
+"""Shared setup for the benchmark scripts, run them from anywhere as `python benchmarks/<script>.py`."""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# tests/conftest.py registers the igi2cs package when it is not installed, reuse it instead of a second copy.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
+import conftest  # noqa: E402,F401
+
+# Generated inputs are kept between runs, set IGI2CS_BENCH_DIR to put them somewhere else.
+DATA_DIR = Path(os.environ.get("IGI2CS_BENCH_DIR", Path(tempfile.gettempdir()) / "igi2cs-bench"))
+DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+
+def best_of(function, repeat: int = 5) -> float:
+    """Fastest of `repeat` runs of `function`, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,30 @@
+"""ContentManager startup on a 20 level install without a catalog, with a cold and with a warm catalog."""
+import os
+import time
+
+import _setup
+from _data import cached, make_tree
+
+from igi2cs.content_manager import ContentManager
+
+
+def timed(*args) -> float:
+    start = time.perf_counter()
+    ContentManager(*args).close()
+    return time.perf_counter() - start
+
+
+def main():
+    tree = cached(_setup.DATA_DIR / "tree", make_tree)
+    catalog = _setup.DATA_DIR / "catalog.sqlite"
+    catalog.unlink(missing_ok=True)
+    plain = timed(tree)
+    cold = timed(tree, catalog)
+    warm = timed(tree, catalog)
+    print(f"no catalog {plain:.2f}s, cold {cold:.2f}s, warm {warm:.2f}s, catalog {catalog.stat().st_size / 2 ** 20:.1f} MiB")
+    os.utime(tree / "level3" / "pack1.res")
+    print(f"warm with one touched file: {timed(tree, catalog):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
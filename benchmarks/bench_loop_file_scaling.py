@@ -0,0 +1,41 @@
+"""LoopFile chunk traversal time against the number of chunks, on its own and through ResArchive.
+
+Traversal (header reads plus the ident index) should grow linearly with the chunk count. ResArchive
+adds name decoding and its name index on top, which is reported separately.
+"""
+import _setup
+from _data import make_res
+
+from igi2cs.file_utils import MappedBuffer
+from igi2cs.loop_file import LoopFile
+from igi2cs.res import ResArchive
+
+SIZES = (12500, 25000, 50000, 100000)
+
+
+def main():
+    base = None
+    print(f"{'pairs':>7} {'chunks':>7} {'LoopFile':>10} {'us/chunk':>9} {'ratio':>6} {'ResArchive':>11} {'us/pair':>8}")
+    for pairs in SIZES:
+        path = _setup.DATA_DIR / f"scaling_{pairs}.res"
+        if not path.exists():
+            make_res(path, pairs, 16)
+        with MappedBuffer(path) as buffer:
+            def traverse():
+                buffer.seek(0)
+                LoopFile(buffer, lazy=True)
+
+            def archive():
+                buffer.seek(0)
+                ResArchive(buffer, lazy=True)
+
+            loop_time = _setup.best_of(traverse)
+            archive_time = _setup.best_of(archive)
+        chunks = 2 * pairs
+        base = base or loop_time / chunks
+        print(f"{pairs:7} {chunks:7} {loop_time * 1e3:8.1f}ms {loop_time / chunks * 1e6:9.2f} "
+              f"{loop_time / chunks / base:6.2f} {archive_time * 1e3:9.1f}ms {archive_time / pairs * 1e6:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Indexing a 256 MiB ILFF file through FileBuffer and MappedBuffer slices, time and peak RSS.
+
+Every variant runs in its own process so the peak RSS numbers don't include each other.
+"""
+import resource
+import subprocess
+import sys
+import time
+
+import _setup
+from _data import make_res
+
+from igi2cs.file_utils import FileBuffer, MappedBuffer
+from igi2cs.loop_header import FFLIHeader
+
+PATH = _setup.DATA_DIR / "big.ilff"
+BUFFERS = {"FileBuffer": FileBuffer, "MappedBuffer": MappedBuffer}
+
+
+def index(buffer_class) -> int:
+    with buffer_class(PATH) as buffer:
+        FFLIHeader.from_buffer(buffer)
+        buffer.read(4)
+        chunks = []
+        while buffer:
+            header = FFLIHeader.from_buffer(buffer)
+            chunks.append(buffer.slice(size=header.data_size))
+            buffer.skip(header.data_size)
+            buffer.align(header.alignment)
+        return len(chunks)
+
+
+def main():
+    if len(sys.argv) > 1:
+        start = time.perf_counter()
+        count = index(BUFFERS[sys.argv[1]])
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024
+        print(f"{sys.argv[1]:12} {time.perf_counter() - start:6.3f}s {count} chunks, peak RSS {peak} MiB")
+        return
+    if not PATH.exists():
+        make_res(PATH, 1000, 256 * 1024)
+    for name in BUFFERS:
+        subprocess.run([sys.executable, __file__, name], check=True)
+
+
+if __name__ == "__main__":
+    main()
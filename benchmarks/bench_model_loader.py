@@ -0,0 +1,64 @@
+"""ModelLoader: 50 models with their textures loaded one after another, concurrently, in one batch and cached."""
+import shutil
+import time
+
+import _setup
+from _data import make_mef, make_mtp, make_tex
+
+from igi2cs.asset_cache import AssetCache
+from igi2cs.content_manager import ContentManager
+from igi2cs.file_utils import FileBuffer, MemoryBuffer
+from igi2cs.loop_file import LoopFileWriter
+from igi2cs.model_loader import ModelLoader
+from igi2cs.mtp import MTPFile
+from igi2cs.vfs import VirtualFileSystem
+
+MODELS = 50
+
+
+def make_level(root):
+    level = root / "level"
+    level.mkdir(parents=True)
+    mtp_data = make_mtp(MODELS, 200, 5, seed=3)
+    (level / "level.mtp").write_bytes(mtp_data)
+    mtp = MTPFile(MemoryBuffer(mtp_data))
+    with FileBuffer(level / "models.res", "wb") as f, LoopFileWriter(f, "IRES") as writer:
+        for i in range(MODELS):
+            writer.write_chunk("NAME", b"LOCAL:model_%06d.mef\x00" % i)
+            writer.write_chunk("BODY", make_mef(len(mtp.get_texture_names("model_%06d" % i))))
+    with FileBuffer(level / "textures.res", "wb") as f, LoopFileWriter(f, "IRES") as writer:
+        # The last texture is left out, so some models have a missing texture.
+        for i in range(199):
+            writer.write_chunk("NAME", b"LOCAL:textures\\tex_%06d.tex\x00" % i)
+            writer.write_chunk("BODY", make_tex(512, 512, seed=i))
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) / MODELS * 1e3
+
+
+def main():
+    root = _setup.DATA_DIR / "model_loader"
+    shutil.rmtree(root, ignore_errors=True)
+    make_level(root)
+    content_manager = ContentManager(root)
+    vfs = VirtualFileSystem(content_manager)
+    models = [f"level/model_{i:06d}.mef" for i in range(MODELS)]
+    with ModelLoader(vfs, max_workers=8) as loader:
+        for rgba in (False, True):
+            sequential = timed(lambda: [loader.load_sequential(model, rgba) for model in models])
+            concurrent = timed(lambda: [loader.load(model, rgba) for model in models])
+            batch = timed(lambda: loader.load_many(models, rgba))
+            print(f"rgba={rgba}: sequential {sequential:.2f} ms/model, concurrent {concurrent:.2f} ms/model, "
+                  f"load_many {batch:.2f} ms/model")
+    cache = AssetCache(content_manager, 512 << 20)
+    with ModelLoader(vfs, cache, max_workers=8) as loader:
+        loader.load_many(models, True)
+        print(f"cached: {timed(lambda: [loader.load(model, True) for model in models]):.3f} ms/model, {cache.stats}")
+    content_manager.close()
+
+
+if __name__ == "__main__":
+    main()
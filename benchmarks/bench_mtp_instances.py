@@ -0,0 +1,35 @@
+"""MTP parsing with INST decoded into flat arrays: one 20k model MTP, then every MTP of the synthetic install."""
+import json
+import time
+
+import _setup
+from _data import cached, make_mtp, make_tree
+
+from igi2cs.file_utils import MappedBuffer, MemoryBuffer
+from igi2cs.mtp import MTPFile
+
+
+def main():
+    data = make_mtp(20000, 20000, 2000, seed=5)
+    print(f"20k model MTP: {_setup.best_of(lambda: MTPFile(MemoryBuffer(data))) * 1e3:.1f} ms")
+
+    paths = sorted(cached(_setup.DATA_DIR / "tree", make_tree).rglob("*.mtp"))
+    start = time.perf_counter()
+    mtps = [MTPFile(MappedBuffer(path)) for path in paths]
+    parse = time.perf_counter() - start
+    start = time.perf_counter()
+    names = [[mtp.get_texture_names(model) for model in mtp.models] for mtp in mtps]
+    lookups = time.perf_counter() - start
+    start = time.perf_counter()
+    summaries = [mtp.to_summary() for mtp in mtps]
+    to_summary = time.perf_counter() - start
+    start = time.perf_counter()
+    restored = [MTPFile.from_summary(json.loads(json.dumps(summary))) for summary in summaries]
+    from_summary = time.perf_counter() - start
+    assert [[mtp.get_texture_names(model) for model in mtp.models] for mtp in restored] == names
+    print(f"{len(paths)} MTPs: parse {parse:.2f}s, every model's lookup {lookups:.2f}s, "
+          f"to_summary {to_summary:.2f}s, JSON round trip and from_summary {from_summary:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
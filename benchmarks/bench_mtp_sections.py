@@ -0,0 +1,19 @@
+"""Time from MTP bytes to the first texture lookup, decoding every section against TEXTURE_SECTIONS only."""
+import _setup
+from _data import make_mtp
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mtp import MTPFile, TEXTURE_SECTIONS
+
+
+def main():
+    data = make_mtp(20000, 20000, 50000, seed=5)
+    for label, sections in (("all sections", None), ("TEXTURE_SECTIONS", TEXTURE_SECTIONS)):
+        def first_lookup():
+            MTPFile(MemoryBuffer(data), sections=sections).get_texture_names("model_000123")
+
+        print(f"{label:17} time to first lookup {_setup.best_of(first_lookup) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
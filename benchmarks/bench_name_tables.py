@@ -0,0 +1,34 @@
+"""Zero-terminated name tables: a whole MTP, and 50k names read one by one against read_cstring_table."""
+import _setup
+from _data import make_mtp
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mtp import MTPFile
+
+COUNT = 50000
+
+
+def main():
+    data = make_mtp()
+    seconds = _setup.best_of(lambda: MTPFile(MemoryBuffer(data)), 3)
+    mtp = MTPFile(MemoryBuffer(data))
+    names = len(mtp.animations) + len(mtp.sounds) + len(mtp.sound_volumes) + len(mtp.models) + len(mtp.textures)
+    print(f"MTP with {names} names: {seconds * 1e3:.0f} ms")
+
+    buffer = MemoryBuffer(b"".join(b"name_%06d\x00" % i for i in range(COUNT)))
+
+    def one_by_one():
+        buffer.seek(0)
+        return [buffer.read_ascii_string() for _ in range(COUNT)]
+
+    def table():
+        buffer.seek(0)
+        return buffer.read_cstring_table(COUNT)
+
+    assert one_by_one() == table()
+    print(f"{COUNT // 1000}k names: read_ascii_string loop {_setup.best_of(one_by_one) * 1e3:.1f} ms, "
+          f"read_cstring_table {_setup.best_of(table) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
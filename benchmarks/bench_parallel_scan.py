@@ -0,0 +1,46 @@
+"""ContentManager scan of 2000 small RES archives and 200 MTPs with 1, 2 and 4 parser processes."""
+import os
+import random
+import time
+
+import _setup
+from _data import make_mtp
+
+from igi2cs.content_manager import ContentManager
+from igi2cs.file_utils import FileBuffer
+from igi2cs.loop_file import LoopFileWriter
+
+
+def make_packs(root):
+    rnd = random.Random(0)
+    for i in range(2000):
+        directory = root / f"area{i % 40}" / f"pack{i}"
+        directory.mkdir(parents=True)
+        with FileBuffer(directory / "data.res", "wb") as f, LoopFileWriter(f, "IRES") as writer:
+            for entry in range(200):
+                writer.write_chunk("NAME", b"LOCAL:f%d.bin\x00" % entry)
+                writer.write_chunk("BODY", rnd.randbytes(32))
+        if i % 10 == 0:
+            (directory / "level.mtp").write_bytes(make_mtp(300, 300, 50, seed=i))
+
+
+def main():
+    root = _setup.DATA_DIR / "packs"
+    if not root.exists():
+        make_packs(root)
+    print(f"{os.cpu_count()} CPUs")
+    reference = None
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        content_manager = ContentManager(root, max_workers=workers)
+        seconds = time.perf_counter() - start
+        summaries = ([(record.path, record.mtp.to_summary()) for record in content_manager.mpt_records],
+                     [(record.path, record.res.to_summary()) for record in content_manager.res_records])
+        content_manager.close()
+        reference = reference or summaries
+        assert summaries == reference
+        print(f"max_workers={workers}: {len(summaries[0])} MTP + {len(summaries[1])} RES in {seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Records per second decoded by from_buffer for MEF types built on RecordSchema."""
+import os
+import struct
+
+import _setup
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mef import Attachment, ModelInfo, SkinnedFaceGroup
+
+
+def main():
+    raw = bytearray(os.urandom(400))
+    raw[0:4] = struct.pack("<f", 1.0)
+    raw[4:32] = struct.pack("<7I", 2000, 1, 1, 0, 0, 0, 0)
+    raw[32:36] = struct.pack("<I", 1)
+    for record_class, args, count in ((SkinnedFaceGroup, (1,), 100000), (Attachment, (), 100000),
+                                      (ModelInfo, (), 20000)):
+        buffer = MemoryBuffer(bytes(raw[:record_class.schema.size]) * count)
+
+        def run():
+            buffer.seek(0)
+            for _ in range(count):
+                record_class.from_buffer(buffer, *args)
+
+        seconds = _setup.best_of(run)
+        print(f"{record_class.__name__:17} {count / seconds / 1e3:6.0f} k records/s")
+
+
+if __name__ == "__main__":
+    main()
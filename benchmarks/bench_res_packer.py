@@ -0,0 +1,56 @@
+"""Overlaying three mod directories that share most files, with ResPacker against a first-wins loop without hashing."""
+import random
+import shutil
+import time
+
+import _setup
+
+from igi2cs.file_utils import FileBuffer, MappedBuffer
+from igi2cs.loop_file import LoopFileWriter
+from igi2cs.res import ResArchive, ResPacker
+
+
+def main():
+    rnd = random.Random(2)
+    mods = _setup.DATA_DIR / "mods"
+    shutil.rmtree(mods, ignore_errors=True)
+    files = {f"textures/t{i:05d}.tex": rnd.randbytes(rnd.randrange(1000, 30000)) for i in range(3000)}
+    for mod in range(3):
+        for name, data in files.items():
+            if mod and rnd.random() < 0.02:
+                continue
+            path = mods / f"mod{mod}" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+    directories = [mods / f"mod{mod}" for mod in range(3)]
+
+    packed = _setup.DATA_DIR / "packed.res"
+    start = time.perf_counter()
+    with FileBuffer(packed, "wb") as f, ResPacker(f, path_list_name="LOCAL:") as packer:
+        for directory in directories:
+            packer.add_directory(directory)
+    packer_seconds = time.perf_counter() - start
+
+    naive = _setup.DATA_DIR / "naive.res"
+    start = time.perf_counter()
+    seen = set()
+    with FileBuffer(naive, "wb") as f, LoopFileWriter(f, "IRES") as writer:
+        for directory in directories:
+            for path in sorted(directory.rglob("*")):
+                name = "LOCAL:" + path.relative_to(directory).as_posix()
+                if path.is_file() and name.lower() not in seen:
+                    seen.add(name.lower())
+                    writer.write_chunk("NAME", name.encode("latin-1") + b"\x00")
+                    writer.write_chunk("BODY", path.read_bytes())
+    naive_seconds = time.perf_counter() - start
+
+    print(f"ResPacker {packer_seconds:.2f}s {packed.stat().st_size / 1e6:.1f} MB ({packer.stats}), "
+          f"first-wins loop {naive_seconds:.2f}s {naive.stat().st_size / 1e6:.1f} MB ({len(seen)} entries)")
+    for output in (packed, naive):
+        with MappedBuffer(output) as buffer:
+            archive = ResArchive(buffer)
+            assert len(archive) == len(files) and all(archive[name].read() == data for name, data in files.items())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Scalar read throughput of MemoryBuffer and FileBuffer with the cached compiled structs."""
+import struct
+
+import _setup
+
+from igi2cs.file_utils import FileBuffer, MemoryBuffer
+
+COUNT = 200000
+
+
+def main():
+    data = struct.pack(f"<{COUNT}I", *range(COUNT))
+    path = _setup.DATA_DIR / "u32.bin"
+    path.write_bytes(data)
+    for name, open_buffer in (("MemoryBuffer", lambda: MemoryBuffer(data)), ("FileBuffer", lambda: FileBuffer(path))):
+        for method in ("read_uint32", "read_float"):
+            with open_buffer() as buffer:
+                read = getattr(buffer, method)
+
+                def run():
+                    buffer.seek(0)
+                    for _ in range(COUNT):
+                        read()
+
+                seconds = _setup.best_of(run)
+            print(f"{name:13} {method:12} {COUNT / seconds / 1e6:.2f} M reads/s")
+
+
+if __name__ == "__main__":
+    main()
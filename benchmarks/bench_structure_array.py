@@ -0,0 +1,30 @@
+"""Decoding 200k MTP GTT records one by one with from_buffer against read_structure_array."""
+import struct
+
+import _setup
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mtp import MTPIndex
+
+COUNT = 200000
+
+
+def main():
+    data = b"".join(struct.pack("<Ii", i, i & 7) for i in range(COUNT))
+    buffer = MemoryBuffer(data)
+
+    def per_record():
+        buffer.seek(0)
+        return [MTPIndex.from_buffer(buffer) for _ in range(COUNT)]
+
+    def bulk():
+        return buffer.read_structure_array(0, COUNT, MTPIndex)
+
+    assert per_record()[1234] == bulk()[1234]
+    for label, function in (("from_buffer per record", per_record), ("read_structure_array", bulk)):
+        seconds = _setup.best_of(function)
+        print(f"{label:24} {seconds * 1e3:8.2f} ms total, {seconds / COUNT * 1e9:7.1f} ns per record")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""1024x1024 ARGB8888 texture with mips: parsing, full RGBA conversion and a 64x64 thumbnail from its mip."""
+import _setup
+from _data import make_tex
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.tex import TexTexture
+
+
+def main():
+    data = make_tex(1024, 1024, mips=True)
+
+    def thumbnail():
+        texture = TexTexture(MemoryBuffer(data))
+        texture.convert_to_rgba(texture.level_for_size(64))
+
+    parse = _setup.best_of(lambda: TexTexture(MemoryBuffer(data)), 30)
+    full = _setup.best_of(lambda: TexTexture(MemoryBuffer(data)).convert_to_rgba(), 30)
+    print(f"parse {parse * 1e3:.3f} ms, full conversion {full * 1e3:.2f} ms, "
+          f"64x64 thumbnail {_setup.best_of(thumbnail, 30) * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
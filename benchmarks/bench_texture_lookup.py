@@ -0,0 +1,51 @@
+"""Texture name lookups through ContentManager against scanning the MTP records in order."""
+import random
+import time
+from pathlib import Path
+
+import _setup
+from _data import cached, make_tree
+
+from igi2cs.content_manager import ContentManager
+
+COUNT = 20000
+LINEAR_COUNT = 2000
+
+
+def main():
+    content_manager = ContentManager(cached(_setup.DATA_DIR / "tree", make_tree))
+    rnd = random.Random(1)
+    paths = []
+    for _ in range(COUNT):
+        record = rnd.choice(content_manager.mpt_records)
+        paths.append(record.path / "models" / "sub" / (rnd.choice(record.mtp.models) + ".mef"))
+
+    def linear(model_path: Path):
+        for record in content_manager.mpt_records:
+            if model_path.parent.is_relative_to(record.path):
+                mtp = record.mtp
+                model_id = mtp.models.index(model_path.stem)
+                instance = next((instance for instance in mtp.instances if instance.model_id == model_id), None)
+                if instance is None:
+                    return []
+                return [mtp.textures[mtp.texture_infos[i].index] for i in instance.texture_info_ids]
+
+    start = time.perf_counter()
+    reference = [linear(path) for path in paths[:LINEAR_COUNT]]
+    linear_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    indexed = [content_manager.get_texture_names(path) for path in paths]
+    indexed_seconds = time.perf_counter() - start
+    warm_seconds = _setup.best_of(lambda: [content_manager.get_texture_names(path) for path in paths], 3)
+    start = time.perf_counter()
+    batch = content_manager.get_texture_names_batch(paths)
+    batch_seconds = time.perf_counter() - start
+    assert indexed[:LINEAR_COUNT] == reference and [batch[path] for path in paths] == indexed
+    print(f"linear {linear_seconds / LINEAR_COUNT * 1e6:.1f} us/lookup, indexed {indexed_seconds / COUNT * 1e6:.2f} "
+          f"us/lookup (first use included), warm {warm_seconds / COUNT * 1e6:.2f} us/lookup, "
+          f"batch {batch_seconds / COUNT * 1e6:.2f} us/lookup")
+    content_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Reverse texture usage index over the synthetic install against collecting usages through get_texture_names."""
+import random
+import time
+from collections import defaultdict
+
+import _setup
+from _data import cached, make_tree
+
+from igi2cs.content_manager import ContentManager
+
+QUERIES = 10000
+
+
+def main():
+    content_manager = ContentManager(cached(_setup.DATA_DIR / "tree", make_tree))
+    start = time.perf_counter()
+    expected = defaultdict(set)
+    for record in content_manager.mpt_records:
+        for model in record.mtp.models:
+            for slot, name in enumerate(record.mtp.get_texture_names(model)):
+                expected[name].add((record.path, model, slot))
+    scan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = content_manager.texture_usage
+    build = time.perf_counter() - start
+    assert set(index.texture_names()) == set(expected)
+    for name, usages in expected.items():
+        assert {(usage.mtp_path.parent, usage.model_name, usage.slot) for usage in index.find(name)} == usages
+
+    rnd = random.Random(0)
+    names = list(expected)
+    queries = [rnd.choice(names) for _ in range(QUERIES)]
+    start = time.perf_counter()
+    found = sum(len(index.find(name)) for name in queries)
+    find = time.perf_counter() - start
+    print(f"{len(content_manager.mpt_records)} MTPs, {len(names)} textures: collecting through get_texture_names "
+          f"{scan * 1e3:.0f} ms, index build {build * 1e3:.0f} ms, find {find / QUERIES * 1e6:.1f} us "
+          f"({found / QUERIES:.1f} usages per query)")
+    content_manager.close()
+
+
+if __name__ == "__main__":
+    main()
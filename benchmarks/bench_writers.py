@@ -0,0 +1,46 @@
+"""Writing a mesh per scalar against write_array, and fixed-length padded names."""
+import time
+
+import numpy as np
+
+import _setup
+
+from igi2cs.file_utils import WritableMemoryBuffer
+
+
+def main():
+    rng = np.random.default_rng(0)
+    vertices = rng.random((200000, 8), np.float32)
+    faces = rng.integers(0, 65535, (300000, 3)).astype(np.uint16)
+    megabytes = (vertices.nbytes + faces.nbytes) / 2 ** 20
+
+    start = time.perf_counter()
+    per_scalar = WritableMemoryBuffer()
+    for value in vertices.ravel().tolist():
+        per_scalar.write_float(value)
+    for value in faces.ravel().tolist():
+        per_scalar.write_uint16(value)
+    scalar_seconds = time.perf_counter() - start
+
+    def bulk(capacity: int = 0):
+        buffer = WritableMemoryBuffer(capacity=capacity)
+        buffer.write_array(vertices)
+        buffer.write_array(faces)
+        return buffer
+
+    assert bulk().getvalue() == per_scalar.getvalue()
+    preallocated = _setup.best_of(lambda: bulk(vertices.nbytes + faces.nbytes))
+    growing = _setup.best_of(bulk)
+    print(f"{megabytes:.1f} MiB mesh: per scalar {megabytes / scalar_seconds:.1f} MiB/s, "
+          f"write_array preallocated {megabytes / preallocated:.0f} MiB/s, growing {megabytes / growing:.0f} MiB/s")
+
+    def names():
+        buffer = WritableMemoryBuffer()
+        for i in range(20000):
+            buffer.write_ascii_string("textures/some_texture_%05d.tex" % i, length=64)
+
+    print(f"20k names padded to 64 bytes: {_setup.best_of(names) * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional, Union
+
+# Bump whenever the layout of MTPFile/ResArchive summaries changes, stale catalogs are then rebuilt.
+CATALOG_VERSION = 2
+
+
+class Catalog:
+    """Persistent cache of parsed file summaries, keyed by file path, modification time and size.
+
+    A cached summary is only returned while the file on disk still has the mtime and size it had when
+    the summary was stored, so changed files are always parsed again.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != CATALOG_VERSION:
+            self._connection.execute("DROP TABLE IF EXISTS files")
+            self._connection.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, kind TEXT NOT NULL, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, "
+            "summary TEXT NOT NULL)"
+        )
+        self._connection.commit()
+
+    def get(self, path: Path, kind: str, stat: os.stat_result) -> Optional[dict]:
+        row = self._connection.execute(
+            "SELECT summary FROM files WHERE path = ? AND kind = ? AND mtime_ns = ? AND size = ?",
+            (str(path), kind, stat.st_mtime_ns, stat.st_size)
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def put(self, path: Path, kind: str, stat: os.stat_result, summary: dict):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files (path, kind, mtime_ns, size, summary) VALUES (?, ?, ?, ?, ?)",
+            (str(path), kind, stat.st_mtime_ns, stat.st_size, json.dumps(summary, separators=(",", ":")))
+        )
+
+    def prune(self, kind: str, keep: set[Path]):
+        """Drops entries of `kind` for files that are not in `keep` anymore."""
+        keep = {str(path) for path in keep}
+        stale = [(path,) for (path,) in self._connection.execute("SELECT path FROM files WHERE kind = ?", (kind,))
+                 if path not in keep]
+        self._connection.executemany("DELETE FROM files WHERE path = ?", stale)
+
+    def commit(self):
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
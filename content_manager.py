@@ -1,9 +1,15 @@
-from dataclasses import dataclass
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Iterable, Optional, Union
 
-from igi2cs.file_utils import FileBuffer
-from igi2cs.mtp import MTPFile
+from igi2cs.catalog import Catalog
+from igi2cs.file_utils import FileBuffer, MappedBuffer
+from igi2cs.file_watcher import FileChanges, PollingWatcher, create_watcher, walk_files, walk_order_key
+from igi2cs.mtp import MTPFile, TEXTURE_SECTIONS
 from igi2cs.res import ResArchive
+from igi2cs.texture_usage import TextureUsage, TextureUsageIndex
 
 
 @dataclass
@@ -17,32 +23,258 @@ class ResRecord:
     res: ResArchive
 
 
+@dataclass(slots=True)
+class _DirectoryNode:
+    children: dict[str, '_DirectoryNode'] = field(default_factory=dict)
+    record: Optional[MPTRecord] = None
+
+
+def _parse_summary(kind: str, path: Path) -> dict:
+    # Runs in worker processes, only the compact summary is sent back.
+    with MappedBuffer(path) as buffer:
+        if kind == "mtp":
+            return MTPFile(buffer).to_summary()
+        return ResArchive(buffer, lazy=True).to_summary()
+
+
+_SUFFIXES = {".mtp": "mtp", ".res": "res"}
+
+
 class ContentManager:
 
-    def __init__(self, base_path: Path):
+    def __init__(self, base_path: Path, catalog_path: Optional[Path] = None, max_workers: int = 1,
+                 use_inotify: bool = True):
         self._base_path = base_path
-        self._mpt_records: list[MPTRecord] = self.scan_mpt()
-        self._res_records: list[ResRecord] = self.scan_res()
+        # Summaries of unchanged files are taken from the catalog instead of parsing the files again.
+        self._catalog = Catalog(catalog_path) if catalog_path is not None else None
+        # Files that are not in the catalog are parsed in this process. A process pool is opt-in through
+        # max_workers > 1: on spawn platforms (Windows, macOS) it re-imports __main__, so the calling script
+        # needs an `if __name__ == "__main__":` guard, and its speedup depends on the machine.
+        self._max_workers = max_workers
+        # Tracks the scanned files for refresh. The first refresh replaces it with an inotify watcher where one
+        # is available, so managers that never refresh don't hold an inotify fd and a watch per directory.
+        self._watcher: PollingWatcher = PollingWatcher(base_path, _SUFFIXES)
+        self._use_inotify = use_inotify
+        self._watching = False
+        self._mtp_files: dict[Path, MPTRecord] = {}
+        self._res_files: dict[Path, ResRecord] = {}
+        self._texture_usage: Optional[TextureUsageIndex] = None
+        # RES archives stay mapped while they are in use and mmap keeps a duplicate of the file descriptor, so
+        # every archive holds one open fd (mind e.g. the default limit of 256 on macOS) until close().
+        self._mappings: weakref.WeakSet[MappedBuffer] = weakref.WeakSet()
+        self.scan()
+
+    @property
+    def base_path(self) -> Path:
+        return self._base_path
+
+    @property
+    def mpt_records(self) -> list[MPTRecord]:
+        return self._mpt_records
+
+    @property
+    def res_records(self) -> list[ResRecord]:
+        return self._res_records
+
+    @property
+    def texture_usage(self) -> TextureUsageIndex:
+        index = self._texture_usage
+        if index is None:
+            index = self._texture_usage = TextureUsageIndex(
+                (path, record.mtp) for path, record in self._mtp_files.items())
+        return index
+
+    def find_texture_users(self, texture_name: str) -> list[TextureUsage]:
+        """Returns every (MTP file, model, texture slot) that uses `texture_name`."""
+        return self.texture_usage.find(texture_name)
+
+    def get_archive(self, res_path: Path) -> Optional[ResArchive]:
+        record = self._res_files.get(res_path)
+        return record.res if record is not None else None
+
+    def scan(self) -> tuple[list[MPTRecord], list[ResRecord]]:
+        """Parses the whole tree again (unchanged files still come from the catalog)."""
+        mtp_paths, res_paths = self._split_paths(self._watcher.scan())
+        loaded = self._load_files([("mtp", path) for path in mtp_paths] + [("res", path) for path in res_paths])
+        self._set_records({path: MPTRecord(path.parent, mtp) for path, mtp in zip(mtp_paths, loaded)},
+                          {path: ResRecord(path, res) for path, res in zip(res_paths, loaded[len(mtp_paths):])})
+        if self._catalog is not None:
+            self._catalog.prune("mtp", set(mtp_paths))
+            self._catalog.prune("res", set(res_paths))
+            self._catalog.commit()
+        return self._mpt_records, self._res_records
+
+    def refresh(self) -> FileChanges:
+        """Picks up files that were added, modified or removed since the last scan or refresh.
+
+        Only changed files are parsed again, the record lists and indexes are replaced, not mutated, so
+        lists obtained before the refresh stay consistent.
+        """
+        if self._watching:
+            changes = self._watcher.changes()
+        else:
+            self._watcher = create_watcher(self._base_path, _SUFFIXES, self._use_inotify, self._watcher.files)
+            self._watching = True
+            # Nothing was watched since the scan, the first refresh walks the tree once.
+            changes = self._watcher.poll()
+        if not changes:
+            return changes
+        mtp_files = dict(self._mtp_files)
+        res_files = dict(self._res_files)
+        for path in changes.removed:
+            mtp_files.pop(path, None)
+            res_files.pop(path, None)
+        changed = changes.added + changes.modified
+        # The catalog is skipped, a rewritten file can keep its mtime and size.
+        try:
+            loaded = self._load_files([(self._kind(path), path) for path in changed], use_catalog=False)
+        except Exception:
+            # Files may be caught half written, they are reported and parsed again on the next refresh.
+            # Removed files are gone either way and are dropped right away.
+            self._watcher.invalidate(changed)
+            if changes.removed:
+                self._update_records(mtp_files, res_files, pruned=True)
+            raise
+        for path, item in zip(changed, loaded):
+            if isinstance(item, MTPFile):
+                mtp_files[path] = MPTRecord(path.parent, item)
+            else:
+                res_files[path] = ResRecord(path, item)
+        self._update_records(mtp_files, res_files, pruned=bool(changes.removed))
+        return changes
+
+    def _update_records(self, mtp_files: dict[Path, MPTRecord], res_files: dict[Path, ResRecord], pruned: bool):
+        self._set_records(mtp_files, res_files)
+        if self._catalog is not None:
+            if pruned:
+                self._catalog.prune("mtp", set(mtp_files))
+                self._catalog.prune("res", set(res_files))
+            self._catalog.commit()
+
+    def close(self):
+        """Releases the watcher, the catalog and the mapped RES archives, which can't be read afterwards."""
+        self._watcher.close()
+        for mapping in list(self._mappings):
+            mapping.close()
+        if self._catalog is not None:
+            self._catalog.close()
+
+    def _map(self, path: Path) -> MappedBuffer:
+        # Mappings of replaced archives are not closed by refresh, records obtained before it may still read
+        # from them, they are unmapped and their fds closed once they are garbage collected.
+        mapping = MappedBuffer(path)
+        self._mappings.add(mapping)
+        return mapping
+
+    def _set_records(self, mtp_files: dict[Path, MPTRecord], res_files: dict[Path, ResRecord]):
+        self._mtp_files = dict(sorted(mtp_files.items(), key=lambda item: walk_order_key(item[0])))
+        self._res_files = dict(sorted(res_files.items(), key=lambda item: walk_order_key(item[0])))
+        self._mpt_records = list(self._mtp_files.values())
+        self._res_records = list(self._res_files.values())
+        self._mpt_tree = self._build_mpt_tree(self._mpt_records)
+        # Built on first use from the new records.
+        self._texture_usage = None
 
     def scan_mpt(self) -> list[MPTRecord]:
-        mtps = []
-        for mtp_path in self._base_path.rglob("*.mtp"):
-            with FileBuffer(mtp_path) as f:
-                mtp = MTPFile(f)
-                mtps.append(MPTRecord(mtp_path.parent, mtp))
-        return mtps
-
-    def scan_res(self)->list[ResRecord]:
-        ress = []
-        for res_path in self._base_path.rglob("*.res"):
-            with FileBuffer(res_path) as f:
-                res = ResArchive(f)
-                ress.append(ResRecord(res_path, res))
-        return ress
+        mtp_paths, _ = self._walk()
+        return [MPTRecord(path.parent, mtp) for path, mtp in
+                zip(mtp_paths, self._load_files([("mtp", path) for path in mtp_paths]))]
+
+    def scan_res(self) -> list[ResRecord]:
+        _, res_paths = self._walk()
+        return [ResRecord(path, res) for path, res in
+                zip(res_paths, self._load_files([("res", path) for path in res_paths]))]
+
+    def _walk(self) -> tuple[list[Path], list[Path]]:
+        return self._split_paths(walk_files(self._base_path, _SUFFIXES))
+
+    @staticmethod
+    def _kind(path: Path) -> str:
+        return _SUFFIXES[path.suffix.lower()]
+
+    def _split_paths(self, paths: list[Path]) -> tuple[list[Path], list[Path]]:
+        mtp_paths = []
+        res_paths = []
+        for path in paths:
+            (mtp_paths if self._kind(path) == "mtp" else res_paths).append(path)
+        return mtp_paths, res_paths
+
+    def _load_files(self, jobs: list[tuple[str, Path]], use_catalog: bool = True) -> list[Union[MTPFile, ResArchive]]:
+        results: list[Union[MTPFile, ResArchive, None]] = [None] * len(jobs)
+        pending = []
+        for i, (kind, path) in enumerate(jobs):
+            stat = self._watcher.files.get(path) or path.stat()
+            summary = self._catalog.get(path, kind, stat) if self._catalog is not None and use_catalog else None
+            if summary is not None:
+                results[i] = self._from_summary(kind, path, summary)
+            else:
+                pending.append((i, kind, path, stat))
+
+        if self._max_workers > 1 and len(pending) > 1:
+            workers = min(self._max_workers, len(pending))
+            with ProcessPoolExecutor(workers) as pool:
+                summaries = pool.map(_parse_summary, [kind for _, kind, _, _ in pending],
+                                     [path for _, _, path, _ in pending],
+                                     chunksize=max(1, len(pending) // (workers * 4)))
+                for (i, kind, path, stat), summary in zip(pending, summaries):
+                    results[i] = self._from_summary(kind, path, summary)
+                    if self._catalog is not None:
+                        self._catalog.put(path, kind, stat, summary)
+        else:
+            for i, kind, path, stat in pending:
+                results[i] = self._parse(kind, path)
+                if self._catalog is not None:
+                    self._catalog.put(path, kind, stat, results[i].to_summary())
+        return results
+
+    def _parse(self, kind: str, path: Path) -> Union[MTPFile, ResArchive]:
+        if kind == "mtp":
+            with FileBuffer(path) as f:
+                # Name tables that texture resolution does not need are only decoded when they are read.
+                return MTPFile(f, sections=TEXTURE_SECTIONS)
+        # The mapping stays open, bodies are only read when an entry is accessed.
+        return ResArchive(self._map(path), lazy=True)
+
+    def _from_summary(self, kind: str, path: Path, summary: dict) -> Union[MTPFile, ResArchive]:
+        if kind == "mtp":
+            return MTPFile.from_summary(summary)
+        return ResArchive.from_summary(self._map(path), summary)
+
+    @staticmethod
+    def _build_mpt_tree(records: list[MPTRecord]) -> _DirectoryNode:
+        root = _DirectoryNode()
+        for record in records:
+            node = root
+            for part in record.path.parts:
+                node = node.children.setdefault(part, _DirectoryNode())
+            # Records are in walk order, the first record of a directory wins like in a linear scan.
+            if node.record is None:
+                node.record = record
+        return root
+
+    def find_mpt_record(self, directory: Path) -> Optional[MPTRecord]:
+        """Returns the MTP record of the outermost directory containing `directory`."""
+        node = self._mpt_tree
+        for part in directory.parts:
+            node = node.children.get(part)
+            if node is None:
+                return None
+            if node.record is not None:
+                return node.record
+        return None
 
     def get_texture_names(self, model_path: Path):
-        model_name = model_path.stem
-        parent = model_path.parent
-        for record in self._mpt_records:
-            if parent.is_relative_to(record.path):
-                return record.mtp.get_texture_names(model_name)
+        record = self.find_mpt_record(model_path.parent)
+        if record is not None:
+            return record.mtp.get_texture_names(model_path.stem)
+
+    def get_texture_names_batch(self, model_paths: Iterable[Path]) -> dict[Path, Optional[list[str]]]:
+        records: dict[Path, Optional[MPTRecord]] = {}
+        texture_names = {}
+        for model_path in model_paths:
+            parent = model_path.parent
+            if parent not in records:
+                records[parent] = self.find_mpt_record(parent)
+            record = records[parent]
+            texture_names[model_path] = record.mtp.get_texture_names(model_path.stem) if record is not None else None
+        return texture_names
@@ -5,14 +5,21 @@ import abc
 import binascii
 import contextlib
 import io
+import mmap
 import os
 import struct
+import sys
+from collections.abc import Sequence
 from pathlib import Path
-from struct import calcsize, pack, unpack
 from typing import Optional, Protocol, Union, TypeVar, Type
 
+import numpy as np
+
 T = TypeVar("T")
 
+# Compiled struct.Struct objects, one cache per endianness, shared by all buffers.
+_STRUCT_CACHE: dict[str, dict[str, struct.Struct]] = {'<': {}, '>': {}}
+
 class Readable(Protocol):
     @classmethod
     def from_buffer(cls: Type[T], buffer: 'Buffer') -> T:
@@ -21,10 +28,18 @@ class Readable(Protocol):
 TR = TypeVar("TR", bound=Readable)
 
 
+def decode_ascii_string(raw: bytes) -> str:
+    raw = raw.strip(b'\x00')
+    if b'\x00' in raw:
+        raw = raw[:raw.index(b'\x00')]
+    return raw.decode('latin', errors='replace')
+
+
 class Buffer(abc.ABC, io.RawIOBase):
     def __init__(self):
         io.RawIOBase.__init__(self)
         self._endian = '<'
+        self._structs = _STRUCT_CACHE['<']
 
     @contextlib.contextmanager
     def save_current_offset(self):
@@ -76,11 +91,32 @@ class Buffer(abc.ABC, io.RawIOBase):
     def skip(self, size):
         self.seek(size, io.SEEK_CUR)
 
+    def _get_struct(self, fmt: str) -> struct.Struct:
+        compiled = self._structs.get(fmt)
+        if compiled is None:
+            compiled = self._structs[fmt] = struct.Struct(self._endian + fmt)
+        return compiled
+
     def read_fmt(self, fmt):
-        return unpack(self._endian + fmt, self.read(calcsize(self._endian + fmt)))
+        compiled = self._structs.get(fmt) or self._get_struct(fmt)
+        return compiled.unpack(self.read(compiled.size))
 
     def _read(self, fmt):
-        return unpack(self._endian + fmt, self.read(calcsize(self._endian + fmt)))[0]
+        compiled = self._structs.get(fmt) or self._get_struct(fmt)
+        return compiled.unpack(self.read(compiled.size))[0]
+
+    def read_struct(self, fmt: Union[str, struct.Struct]) -> tuple:
+        if isinstance(fmt, str):
+            fmt = self._structs.get(fmt) or self._get_struct(fmt)
+        return fmt.unpack(self.read(fmt.size))
+
+    def read_view(self, _size: int = -1) -> memoryview:
+        return memoryview(self.read(_size))
+
+    def read_array(self, dtype, count: int) -> np.ndarray:
+        # Byte order of the dtype is always taken from the buffer, same as for scalar reads.
+        dtype = np.dtype(dtype).newbyteorder(self._endian)
+        return np.frombuffer(self.read_view(dtype.itemsize * count), dtype, count)
 
     def read_relative_offset32(self):
         return self.tell() + self.read_uint32()
@@ -117,10 +153,7 @@ class Buffer(abc.ABC, io.RawIOBase):
 
     def read_ascii_string(self, length: Optional[int] = None):
         if length is not None:
-            buffer = self.read(length).strip(b'\x00').rstrip(b'\x00')
-            if b'\x00' in buffer:
-                buffer = buffer[:buffer.index(b'\x00')]
-            return buffer.decode('latin', errors='replace')
+            return decode_ascii_string(self.read(length))
 
         buffer = bytearray()
 
@@ -138,11 +171,28 @@ class Buffer(abc.ABC, io.RawIOBase):
                 self.seek(-(len(chunk) - chunk_end - 1), io.SEEK_CUR)
                 return buffer.decode('latin', errors='replace')
 
+    def read_cstring_table(self, count: int, intern: bool = False) -> list[str]:
+        if count == 0:
+            return []
+        start = self.tell()
+        data = self.read_view().tobytes()
+        parts = data.split(b'\x00', count)
+        if len(parts) < count:
+            raise BufferError(f"Expected {count} strings, found only {len(parts)}")
+        # The last string may be terminated by the end of the buffer instead of a zero byte.
+        consumed = len(data) - len(parts[count]) if len(parts) > count else len(data)
+        self.seek(start + consumed)
+        strings = b'\x00'.join(parts[:count]).decode('latin').split('\x00')
+        if intern:
+            return list(map(sys.intern, strings))
+        return strings
+
     def read_fourcc(self):
         return self.read_ascii_string(4)
 
     def write_fmt(self, fmt: str, *values):
-        self.write(pack(self._endian + fmt, *values))
+        compiled = self._structs.get(fmt) or self._get_struct(fmt)
+        self.write(compiled.pack(*values))
 
     def write_uint64(self, value):
         self.write_fmt('Q', value)
@@ -174,17 +224,32 @@ class Buffer(abc.ABC, io.RawIOBase):
     def write_double(self, value):
         self.write_fmt('d', value)
 
+    def write_struct(self, fmt: Union[str, struct.Struct], *values):
+        if isinstance(fmt, str):
+            fmt = self._structs.get(fmt) or self._get_struct(fmt)
+        self.write(fmt.pack(*values))
+
+    def write_array(self, array, dtype=None) -> int:
+        # Byte order is taken from the buffer, same as for read_array.
+        array = np.asarray(array, dtype)
+        array = np.ascontiguousarray(array, array.dtype.newbyteorder(self._endian))
+        return self.write(memoryview(array.reshape(-1).view(np.uint8)))
+
+    def write_padding(self, size: int, value: int = 0):
+        if size > 0:
+            self.write(bytes(size) if value == 0 else bytes((value,)) * size)
+
+    def write_align(self, align_to: int, value: int = 0):
+        offset = self.tell()
+        self.write_padding((align_to - offset % align_to) % align_to, value)
+
     def write_ascii_string(self, string, zero_terminated=False, length=-1):
-        pos = self.tell()
-        for c in string:
-            self.write(c.encode('ascii'))
+        data = string.encode('ascii')
         if zero_terminated:
-            self.write(b'\x00')
-        elif length != -1:
-            to_fill = length - (self.tell() - pos)
-            if to_fill > 0:
-                for _ in range(to_fill):
-                    self.write_uint8(0)
+            data += b'\x00'
+        elif length != -1 and len(data) < length:
+            data += bytes(length - len(data))
+        self.write(data)
 
     def write_fourcc(self, fourcc):
         self.write_ascii_string(fourcc)
@@ -199,9 +264,11 @@ class Buffer(abc.ABC, io.RawIOBase):
 
     def set_big_endian(self):
         self._endian = '>'
+        self._structs = _STRUCT_CACHE['>']
 
     def set_little_endian(self):
         self._endian = '<'
+        self._structs = _STRUCT_CACHE['<']
 
     def __bool__(self):
         return self.tell() < self.size()
@@ -209,13 +276,19 @@ class Buffer(abc.ABC, io.RawIOBase):
     def slice(self, offset: Optional[int] = None, size: int = -1) -> 'Buffer':
         raise NotImplementedError
 
-    def read_structure_array(self, offset, count, data_class: Type['Readable']):
+    def read_structure_array(self, offset, count, data_class: Type['Readable'], *args):
         if count == 0:
             return []
         self.seek(offset)
+        # Fixed-size records are decoded in one go, objects are only created when accessed.
+        dtype = getattr(getattr(data_class, 'schema', None), 'dtype', None)
+        if dtype is not None:
+            raw = self.read_view(dtype.itemsize * count)
+            records = np.frombuffer(raw, dtype.newbyteorder(self._endian), count)
+            return StructureArray(records, raw, data_class, self._endian, args)
         object_list = []
         for _ in range(count):
-            obj = data_class.from_buffer(self)
+            obj = data_class.from_buffer(self, *args)
             object_list.append(obj)
         return object_list
 
@@ -238,13 +311,22 @@ class MemoryBuffer(Buffer):
         return len(self._buffer)
 
     def _read(self, fmt: str):
-        data = struct.unpack_from(self._endian + fmt, self._buffer, self._offset)
-        self._offset += struct.calcsize(self._endian + fmt)
+        compiled = self._structs.get(fmt) or self._get_struct(fmt)
+        data = compiled.unpack_from(self._buffer, self._offset)
+        self._offset += compiled.size
         return data[0]
 
     def read_fmt(self, fmt):
-        data = struct.unpack_from(self._endian + fmt, self._buffer, self._offset)
-        self._offset += struct.calcsize(self._endian + fmt)
+        compiled = self._structs.get(fmt) or self._get_struct(fmt)
+        data = compiled.unpack_from(self._buffer, self._offset)
+        self._offset += compiled.size
+        return data
+
+    def read_struct(self, fmt: Union[str, struct.Struct]) -> tuple:
+        if isinstance(fmt, str):
+            fmt = self._structs.get(fmt) or self._get_struct(fmt)
+        data = fmt.unpack_from(self._buffer, self._offset)
+        self._offset += fmt.size
         return data
 
     def write(self, _b: Union[bytes, bytearray]) -> Optional[int]:
@@ -263,6 +345,14 @@ class MemoryBuffer(Buffer):
         self._offset += _size
         return data.tobytes()
 
+    def read_view(self, _size: int = -1) -> memoryview:
+        if _size == -1:
+            data = self._buffer[self._offset:]
+        else:
+            data = self._buffer[self._offset:self._offset + _size]
+        self._offset += len(data)
+        return data
+
     def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
         if whence == io.SEEK_SET:
             self._offset = offset
@@ -300,17 +390,115 @@ class MemoryBuffer(Buffer):
         return MemorySlice(self._buffer[offset:offset + size], slice_offset)
 
 
-class WritableMemoryBuffer(io.BytesIO, Buffer):
-    def __init__(self, initial_bytes=None):
-        io.BytesIO.__init__(self, initial_bytes)
-        Buffer.__init__(self)
+class WritableMemoryBuffer(Buffer):
+    def __init__(self, initial_bytes=None, capacity: int = 0):
+        super().__init__()
+        self._storage = bytearray(initial_bytes if initial_bytes is not None else b'')
+        self._size = len(self._storage)
+        self._offset = 0
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int):
+        # Bytes past the logical size are kept zeroed, so seeking past the end and writing leaves a zero gap.
+        # Growing copies into a new bytearray: views from data or read_view pin the old one, which can't be resized.
+        if capacity > len(self._storage):
+            storage = bytearray(capacity)
+            storage[:self._size] = memoryview(self._storage)[:self._size]
+            self._storage = storage
 
     @property
-    def data(self):
-        return self.getbuffer()
+    def capacity(self) -> int:
+        return len(self._storage)
+
+    @property
+    def data(self) -> memoryview:
+        return memoryview(self._storage)[:self._size]
+
+    def getbuffer(self) -> memoryview:
+        return self.data
+
+    def getvalue(self) -> bytes:
+        with memoryview(self._storage) as view:
+            return view[:self._size].tobytes()
 
     def size(self):
-        return len(self.getbuffer())
+        return self._size
+
+    def write(self, _b) -> int:
+        view = memoryview(_b)
+        if view.ndim != 1 or view.format != 'B':
+            view = view.cast('B')
+        size = view.nbytes
+        end = self._offset + size
+        if end > len(self._storage):
+            self.reserve(max(end, len(self._storage) * 2))
+        self._storage[self._offset:end] = view
+        self._offset = end
+        if end > self._size:
+            self._size = end
+        return size
+
+    def read(self, _size: int = -1) -> bytes:
+        end = self._size if _size == -1 else min(self._offset + _size, self._size)
+        if end <= self._offset:
+            return b''
+        with memoryview(self._storage) as view:
+            data = view[self._offset:end].tobytes()
+        self._offset = end
+        return data
+
+    def read_view(self, _size: int = -1) -> memoryview:
+        end = self._size if _size == -1 else min(self._offset + _size, self._size)
+        data = memoryview(self._storage)[self._offset:max(end, self._offset)]
+        self._offset += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            new_offset = offset
+        elif whence == io.SEEK_CUR:
+            new_offset = self._offset + offset
+        elif whence == io.SEEK_END:
+            new_offset = self._size + offset
+        else:
+            raise ValueError("Invalid whence argument")
+        if new_offset < 0:
+            raise ValueError(f"Negative seek position {new_offset}")
+        self._offset = new_offset
+        return self._offset
+
+    def tell(self) -> int:
+        return self._offset
+
+    def truncate(self, size: Optional[int] = None) -> int:
+        # Same as BytesIO: the buffer is never extended and the position does not move.
+        if size is None:
+            size = self._offset
+        if size < 0:
+            raise ValueError(f"negative size value {size}")
+        if size < self._size:
+            self._storage[size:self._size] = bytes(self._size - size)
+            self._size = size
+        return size
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return self._storage is None
+
+    def close(self) -> None:
+        self._storage = None
+
+    def __repr__(self) -> str:
+        return f'<WritableMemoryBuffer {self.tell()}/{self.size()}>'
 
     def slice(self, offset: Optional[int] = None, size: int = -1) -> 'MemorySlice':
         if offset is None:
@@ -365,6 +553,33 @@ class FileBuffer(io.FileIO, Buffer):
             return MemorySlice(self.read(size), slice_offset)
 
 
+class MappedBuffer(MemoryBuffer):
+
+    def __init__(self, file: Union[str, Path]):
+        with open(file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._mmap = None
+        super().__init__(self._mmap if self._mmap is not None else b'')
+        self.name = str(file)
+
+    def close(self) -> None:
+        if self._buffer is not None:
+            self._buffer.release()
+        super().close()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Slices handed out earlier still reference the mapping, it is unmapped once they are collected.
+                pass
+            self._mmap = None
+
+    def __repr__(self) -> str:
+        return f'<MappedBuffer: {self.name!r} {self.tell()}/{self.size()}>'
+
+
 class MemorySlice(MemoryBuffer):
     def __init__(self, buffer: Union[bytes, bytearray, memoryview], offset: int):
         super().__init__(buffer)
@@ -374,5 +589,38 @@ class MemorySlice(MemoryBuffer):
         return self.tell() + self._slice_offset
 
 
+class StructureArray(Sequence):
+    def __init__(self, records: np.ndarray, raw: memoryview, data_class: Type['Readable'], endian: str,
+                 args: tuple = ()):
+        self.records = records
+        self._raw = raw
+        self._data_class = data_class
+        self._endian = endian
+        self._args = args
+        self._objects: list = [None] * len(records)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError("StructureArray index out of range")
+        obj = self._objects[index]
+        if obj is None:
+            item_size = self.records.itemsize
+            buffer = MemoryBuffer(self._raw[index * item_size:(index + 1) * item_size])
+            if self._endian == '>':
+                buffer.set_big_endian()
+            obj = self._objects[index] = self._data_class.from_buffer(buffer, *self._args)
+        return obj
+
+    def __repr__(self) -> str:
+        return f'<StructureArray {self._data_class.__name__}[{len(self)}]>'
+
 
-__all__ = ['Buffer', 'MemoryBuffer', 'WritableMemoryBuffer', 'FileBuffer', 'Readable']
+__all__ = ['Buffer', 'MemoryBuffer', 'WritableMemoryBuffer', 'FileBuffer', 'MappedBuffer', 'Readable',
+           'StructureArray', 'decode_ascii_string']
@@ -0,0 +1,283 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE |
+               _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+# Events that mean the contents of a file may have changed even if its mtime and size did not.
+_CONTENT_EVENTS = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(slots=True)
+class FileChanges:
+    added: list[Path] = field(default_factory=list)
+    modified: list[Path] = field(default_factory=list)
+    removed: list[Path] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+
+def walk_order_key(path: Path) -> tuple[tuple[str, ...], str]:
+    """Sort key matching the order in which walk_files returns paths."""
+    return path.parent.parts, path.name
+
+
+def walk_files(root: Union[str, Path], suffixes: Iterable[str]) -> list[Path]:
+    """Returns files under `root` with one of `suffixes` (lowercase, case-insensitive match), in a stable
+    top-down order: files of a directory first, then its subdirectories, both sorted by name."""
+    suffixes = tuple(suffixes)
+    paths = []
+    for directory, directories, files in os.walk(root):
+        directories.sort()
+        for file_name in sorted(files):
+            if os.path.splitext(file_name)[1].lower() in suffixes:
+                paths.append(Path(directory, file_name))
+    return paths
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _same_file(a: os.stat_result, b: os.stat_result) -> bool:
+    return a.st_mtime_ns == b.st_mtime_ns and a.st_size == b.st_size
+
+
+class PollingWatcher:
+    """Detects added, modified and removed files by walking the tree and comparing mtime and size.
+
+    `files` seeds the known state, e.g. with the files of another watcher, instead of starting empty.
+    """
+
+    def __init__(self, root: Union[str, Path], suffixes: Iterable[str],
+                 files: Optional[dict[Path, os.stat_result]] = None):
+        self.root = Path(root)
+        self.suffixes = tuple(suffix.lower() for suffix in suffixes)
+        self._files: dict[Path, os.stat_result] = dict(files) if files is not None else {}
+        self._invalid: set[Path] = set()
+
+    @property
+    def files(self) -> dict[Path, os.stat_result]:
+        """Stat results of all known files, as of the last scan or changes call."""
+        return self._files
+
+    def scan(self) -> list[Path]:
+        """Walks the whole tree, replacing the known state, and returns the files found in walk order."""
+        self._files = {}
+        self._invalid.clear()
+        for path in walk_files(self.root, self.suffixes):
+            stat = _stat(path)
+            if stat is not None:
+                self._files[path] = stat
+        return list(self._files)
+
+    def changes(self) -> FileChanges:
+        """Returns the files that changed since the last call (or scan) and updates the known state."""
+        return self.poll()
+
+    def poll(self) -> FileChanges:
+        """Like changes, but always walks the whole tree."""
+        return self._classify(set(walk_files(self.root, self.suffixes)) | self._files.keys())
+
+    def invalidate(self, paths: Iterable[Path]):
+        """Forgets `paths`, so the next changes call reports them again, e.g. after they failed to load."""
+        for path in paths:
+            self._files.pop(path, None)
+            self._invalid.add(path)
+
+    def _classify(self, paths: Iterable[Path], touched: frozenset[Path] = frozenset()) -> FileChanges:
+        changes = FileChanges()
+        paths = set(paths) | self._invalid
+        self._invalid.clear()
+        for path in sorted(paths, key=walk_order_key):
+            stat = _stat(path)
+            known = self._files.get(path)
+            if stat is None:
+                if known is not None:
+                    del self._files[path]
+                    changes.removed.append(path)
+            elif known is None:
+                self._files[path] = stat
+                changes.added.append(path)
+            elif path in touched or not _same_file(stat, known):
+                self._files[path] = stat
+                changes.modified.append(path)
+        return changes
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class InotifyWatcher(PollingWatcher):
+    """Linux watcher fed by inotify events, only the paths named by events are checked again.
+
+    Every directory of the tree gets a watch, so the tree does not have to be walked to find changes.
+    If the kernel event queue overflows, changes falls back to a full polling pass.
+    """
+
+    def __init__(self, root: Union[str, Path], suffixes: Iterable[str],
+                 files: Optional[dict[Path, os.stat_result]] = None):
+        super().__init__(root, suffixes, files)
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: dict[int, Path] = {}
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    @staticmethod
+    def available() -> bool:
+        return _load_libc() is not None
+
+    def _watch_tree(self, root: Path):
+        for directory, directories, _ in os.walk(root):
+            self._add_watch(Path(directory))
+
+    def _add_watch(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # The directory may be gone again already, anything else (e.g. the watch limit) is fatal.
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+        self._watches[wd] = directory
+
+    def _unwatch_tree(self, root: Path):
+        for wd, directory in list(self._watches.items()):
+            if directory == root or directory.is_relative_to(root):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def scan(self) -> list[Path]:
+        # Events queued so far are covered by the walk.
+        self._read_events()
+        return super().scan()
+
+    def _read_events(self) -> list[tuple[int, int, str]]:
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def poll(self) -> FileChanges:
+        # The walk covers the queued events.
+        self._read_events()
+        return super().poll()
+
+    def changes(self) -> FileChanges:
+        paths: set[Path] = set()
+        touched: set[Path] = set()
+        for wd, mask, name in self._read_events():
+            if mask & _IN_Q_OVERFLOW:
+                self._unwatch_tree(self.root)
+                self._watch_tree(self.root)
+                return self.poll()
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                # Files are reported by the parent's events, only forget the directory.
+                paths.update(path for path in self._files if path.is_relative_to(directory))
+                continue
+            path = directory / name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Files created before the watch was added do not produce events, walk them once.
+                    self._watch_tree(path)
+                    paths.update(walk_files(path, self.suffixes))
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    self._unwatch_tree(path)
+                    paths.update(known for known in self._files if known.is_relative_to(path))
+            elif os.path.splitext(name)[1].lower() in self.suffixes:
+                paths.add(path)
+                if mask & _CONTENT_EVENTS:
+                    touched.add(path)
+        return self._classify(paths, frozenset(touched))
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches.clear()
+
+
+_LIBC: Optional[ctypes.CDLL] = None
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    global _LIBC
+    if _LIBC is None:
+        if not sys.platform.startswith("linux"):
+            return None
+        name = ctypes.util.find_library("c")
+        try:
+            libc = ctypes.CDLL(name, use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        except (OSError, AttributeError, TypeError):
+            # TypeError: find_library found no C library and CDLL does not accept None on every version.
+            return None
+        _LIBC = libc
+    return _LIBC
+
+
+def create_watcher(root: Union[str, Path], suffixes: Iterable[str], use_inotify: bool = True,
+                   files: Optional[dict[Path, os.stat_result]] = None) -> PollingWatcher:
+    """Returns an InotifyWatcher where inotify is available and usable (Linux), a PollingWatcher otherwise."""
+    if use_inotify and InotifyWatcher.available():
+        try:
+            return InotifyWatcher(root, suffixes, files)
+        except OSError:
+            pass
+    return PollingWatcher(root, suffixes, files)
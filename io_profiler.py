@@ -0,0 +1,189 @@
+import functools
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, asdict
+from types import CodeType
+from typing import Optional
+
+from igi2cs.file_utils import Buffer
+
+# Code objects of parser entry points, reads are attributed to the innermost one on the call stack.
+_PARSERS: dict[CodeType, str] = {}
+
+_READ_METHODS = ('read', 'readinto', 'read_view', '_read', 'read_fmt', 'read_struct', 'read_array',
+                 'read_ascii_string', 'read_cstring_table')
+_SEEK_METHODS = ('seek',)
+
+UNATTRIBUTED = "<unattributed>"
+
+
+def io_profiled(func):
+    """Registers a parser entry point for BufferProfiler attribution.
+
+    The function is returned unchanged, so registration costs nothing while profiling is disabled.
+    """
+    name = func.__qualname__
+    if name.endswith(".__init__"):
+        name = name[:-len(".__init__")]
+    _PARSERS[func.__code__] = name
+    return func
+
+
+@dataclass(slots=True)
+class IOStats:
+    read_calls: int = 0
+    bytes_read: int = 0
+    seeks: int = 0
+    seconds: float = 0.0
+
+
+class _CallDepth(threading.local):
+    depth = 0
+
+
+class BufferProfiler:
+    """Counts Buffer reads, bytes read, seeks and time spent, grouped by the calling parser.
+
+    While active, the read and seek methods of every Buffer subclass are replaced with counting
+    wrappers; stopping the profiler puts the original methods back. Nested calls (e.g. read_fmt going
+    through read) are only counted once, at the outermost call.
+    """
+    _active: Optional['BufferProfiler'] = None
+
+    def __init__(self):
+        self.stats: dict[str, IOStats] = {}
+        self._lock = threading.Lock()
+        self._call_depth = _CallDepth()
+        self._patches: list[tuple[type, str, object]] = []
+
+    def start(self):
+        if BufferProfiler._active is not None:
+            raise RuntimeError("Another BufferProfiler is already active")
+        BufferProfiler._active = self
+        patches = []
+        for cls in _buffer_classes():
+            for name in _READ_METHODS + _SEEK_METHODS:
+                owner = next((klass for klass in cls.__mro__ if name in klass.__dict__), None)
+                # Methods inherited from another Buffer class are patched on that class instead.
+                if owner is None or (owner is not cls and issubclass(owner, Buffer)):
+                    continue
+                patches.append((cls, name, owner.__dict__[name]))
+        for cls, name, method in patches:
+            self._patches.append((cls, name, cls.__dict__.get(name)))
+            wrapper = self._wrap_seek(method) if name in _SEEK_METHODS else self._wrap_read(method)
+            setattr(cls, name, wrapper)
+
+    def stop(self):
+        for cls, name, original in reversed(self._patches):
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+        self._patches.clear()
+        BufferProfiler._active = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def _record(self, parser: str, read_calls: int, bytes_read: int, seeks: int, seconds: float):
+        with self._lock:
+            stats = self.stats.get(parser)
+            if stats is None:
+                stats = self.stats[parser] = IOStats()
+            stats.read_calls += read_calls
+            stats.bytes_read += bytes_read
+            stats.seeks += seeks
+            stats.seconds += seconds
+
+    def _wrap_read(self, method):
+        call_depth = self._call_depth
+
+        @functools.wraps(method)
+        def wrapper(buffer, *args, **kwargs):
+            if call_depth.depth:
+                return method(buffer, *args, **kwargs)
+            call_depth.depth = 1
+            try:
+                start_offset = buffer.tell()
+                start = time.perf_counter()
+                result = method(buffer, *args, **kwargs)
+                elapsed = time.perf_counter() - start
+                bytes_read = buffer.tell() - start_offset
+            finally:
+                call_depth.depth = 0
+            self._record(_calling_parser(), 1, bytes_read, 0, elapsed)
+            return result
+
+        return wrapper
+
+    def _wrap_seek(self, method):
+        call_depth = self._call_depth
+
+        @functools.wraps(method)
+        def wrapper(buffer, *args, **kwargs):
+            if call_depth.depth:
+                return method(buffer, *args, **kwargs)
+            call_depth.depth = 1
+            try:
+                start = time.perf_counter()
+                result = method(buffer, *args, **kwargs)
+                elapsed = time.perf_counter() - start
+            finally:
+                call_depth.depth = 0
+            self._record(_calling_parser(), 0, 0, 1, elapsed)
+            return result
+
+        return wrapper
+
+    @property
+    def total(self) -> IOStats:
+        total = IOStats()
+        with self._lock:
+            for stats in self.stats.values():
+                total.read_calls += stats.read_calls
+                total.bytes_read += stats.bytes_read
+                total.seeks += stats.seeks
+                total.seconds += stats.seconds
+        return total
+
+    def report(self) -> dict[str, dict]:
+        with self._lock:
+            return {parser: asdict(stats) for parser, stats in self.stats.items()}
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.report(), indent=indent)
+
+    def summary(self) -> str:
+        rows = sorted(self.report().items(), key=lambda item: item[1]["seconds"], reverse=True)
+        lines = [f"{'parser':<24} {'reads':>10} {'bytes':>14} {'seeks':>10} {'seconds':>10}"]
+        for parser, stats in rows:
+            lines.append(f"{parser:<24} {stats['read_calls']:>10} {stats['bytes_read']:>14} "
+                         f"{stats['seeks']:>10} {stats['seconds']:>10.4f}")
+        return "\n".join(lines)
+
+
+def _buffer_classes() -> list[type]:
+    classes = [Buffer]
+    for cls in classes:
+        classes.extend(sub for sub in cls.__subclasses__() if sub not in classes)
+    return classes
+
+
+def _calling_parser() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        parser = _PARSERS.get(frame.f_code)
+        if parser is not None:
+            return parser
+        frame = frame.f_back
+    return UNATTRIBUTED
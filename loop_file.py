@@ -1,20 +1,70 @@
-from dataclasses import dataclass
+import contextlib
+import os
+import threading
+import weakref
+from bisect import bisect_left
+from collections.abc import Iterator
+from dataclasses import dataclass, field
 
-from igi2cs.file_utils import Buffer, MemoryBuffer
+import numpy as np
+
+from igi2cs.file_utils import Buffer, FileBuffer, MemoryBuffer
 from igi2cs.loop_header import FFLIHeader
 
+# One lock per source for lazy payload reads that have to seek, held only while that source is read.
+_SOURCE_LOCKS = weakref.WeakKeyDictionary()
+_SOURCE_LOCKS_GUARD = threading.Lock()
+
+
+def _source_lock(source: Buffer) -> threading.Lock:
+    with _SOURCE_LOCKS_GUARD:
+        lock = _SOURCE_LOCKS.get(source)
+        if lock is None:
+            lock = _SOURCE_LOCKS[source] = threading.Lock()
+        return lock
+
+
+def _pread(fd: int, offset: int, size: int) -> bytes:
+    parts = []
+    while size > 0:
+        data = os.pread(fd, size, offset)
+        if not data:
+            break
+        parts.append(data)
+        offset += len(data)
+        size -= len(data)
+    return parts[0] if len(parts) == 1 else b"".join(parts)
+
 
 @dataclass(slots=True)
 class LoopChunk:
-    """Represents a chunk in the ILFF file with its header and associated buffer."""
+    """Represents a chunk in the ILFF file with its header and the location of its payload."""
     header: FFLIHeader
-    buffer: Buffer
+    offset: int
+    source: Buffer = field(repr=False)
+    _buffer: Buffer | None = field(default=None, repr=False)
 
     @property
     def ident(self):
         """Shortcut to header.ident."""
         return self.header.ident
 
+    @property
+    def buffer(self) -> Buffer:
+        """Payload buffer, read from the source buffer on first access."""
+        if self._buffer is None:
+            source = self.source
+            if isinstance(source, MemoryBuffer):
+                # Sliced without moving the read position, so chunks can be read from several threads at once.
+                self._buffer = MemoryBuffer(source.data[self.offset:self.offset + self.header.data_size])
+            elif isinstance(source, FileBuffer) and hasattr(os, "pread"):
+                # pread leaves the file position alone, so other readers of the same file are not disturbed.
+                self._buffer = MemoryBuffer(_pread(source.fileno(), self.offset, self.header.data_size))
+            else:
+                with _source_lock(source), source.read_from_offset(self.offset):
+                    self._buffer = MemoryBuffer(source.read_view(self.header.data_size))
+        return self._buffer
+
 
 class MultipleChunksFound(Exception):
     """Raised when multiple chunks with the same identifier are found."""
@@ -34,12 +84,16 @@ class UnexpectedChunk(Exception):
 class LoopFile:
     """Parses an FFLI file, storing its header, container type, and chunks."""
 
-    def __init__(self, buffer: Buffer, flip_ident: bool = False):
+    def __init__(self, buffer: Buffer, flip_ident: bool = False, lazy: bool = False):
         """Initializes a LoopFile object, parsing the FFLI header and chunks.
 
+        In lazy mode only chunk headers are read, payloads are read from `buffer` when a chunk's
+        buffer is first accessed, so `buffer` has to stay open for as long as the chunks are used.
+
         Args:
             buffer (Buffer): The buffer containing FFLI file data.
             flip_ident (bool): Boolean to toggle ident flip.
+            lazy (bool): Only index chunk headers and load payloads on demand.
 
         Raises:
             InvalidLoopHeader: If the FFLI header identifier is invalid.
@@ -51,12 +105,19 @@ class LoopFile:
         self.container_type = buffer.read_ascii_string(4)
 
         self._all_chunks: list[LoopChunk] = []
+        self._positions: dict[str, list[int]] = {}
         while buffer:
             chunk = FFLIHeader.from_buffer(buffer, flip_ident)
-            chunk_buffer = MemoryBuffer(buffer.read(chunk.data_size))
-            self._all_chunks.append(LoopChunk(chunk, chunk_buffer))
+            offset = buffer.tell()
+            if lazy:
+                buffer.skip(chunk.data_size)
+                self._all_chunks.append(LoopChunk(chunk, offset, buffer))
+            else:
+                chunk_buffer = MemoryBuffer(buffer.read_view(chunk.data_size))
+                self._all_chunks.append(LoopChunk(chunk, offset, buffer, chunk_buffer))
+            self._positions.setdefault(chunk.ident, []).append(len(self._all_chunks) - 1)
             buffer.align(chunk.alignment)
-        self.chunk_stack = self._all_chunks.copy()
+        self._cursor = 0
 
     def is_container_for(self, c_type: str) -> bool:
         """Checks if the container type matches `c_type`.
@@ -69,13 +130,25 @@ class LoopFile:
         """
         return self.container_type == c_type
 
+    @property
+    def chunk_stack(self) -> list[LoopChunk]:
+        """Chunks that were not consumed yet, in file order."""
+        return self._all_chunks[self._cursor:]
+
     def next_chunk(self) -> LoopChunk:
-        """Returns the next chunk from the chunk stack.
+        """Returns the next chunk and advances the cursor.
 
         Returns:
             LoopChunk: The next chunk.
+
+        Raises:
+            IndexError: If all chunks were consumed.
         """
-        return self.chunk_stack.pop(0)
+        if self._cursor >= len(self._all_chunks):
+            raise IndexError("No chunks left")
+        chunk = self._all_chunks[self._cursor]
+        self._cursor += 1
+        return chunk
 
     def expect_chunk(self, ident: str) -> LoopChunk:
         """Returns the top chunk if it matches the expected identifier.
@@ -89,10 +162,10 @@ class LoopFile:
         Raises:
             UnexpectedChunk: If the top chunk identifier does not match.
         """
-        top = self.chunk_stack[0]
+        top = self._all_chunks[self._cursor]
         if top.header.ident != ident:
             raise UnexpectedChunk(f"Expected {ident!r}, but got {top.header.ident!r}")
-        self.chunk_stack.pop(0)
+        self._cursor += 1
         return top
 
     def find_chunk(self, ident: str) -> LoopChunk | None:
@@ -107,12 +180,186 @@ class LoopFile:
         Raises:
             MultipleChunksFound: If multiple chunks with the same identifier are found.
         """
-        filtered = list(filter(lambda c: c.header.ident == ident, self.chunk_stack))
-        if len(filtered) > 1:
+        positions = self._positions.get(ident, [])
+        first = bisect_left(positions, self._cursor)
+        if len(positions) - first > 1:
             raise MultipleChunksFound(f"Multiple chunks found with {ident!r} ident")
-        if filtered:
-            return filtered[0]
+        if first < len(positions):
+            return self._all_chunks[positions[first]]
+
+    def find_chunks(self, ident: str) -> list[LoopChunk]:
+        """Returns all chunks with the specified identifier that were not consumed yet.
+
+        Args:
+            ident (str): Identifier to search for.
+
+        Returns:
+            list[LoopChunk]: Matching chunks in file order.
+        """
+        positions = self._positions.get(ident, [])
+        return [self._all_chunks[i] for i in positions[bisect_left(positions, self._cursor):]]
+
+    def chunk_positions(self, ident: str) -> list[int]:
+        """Returns the positions of all chunks with the specified identifier, consumed or not.
+
+        Args:
+            ident (str): Identifier to search for.
+
+        Returns:
+            list[int]: Chunk positions usable with `chunk_at` and `seek_chunk`.
+        """
+        return list(self._positions.get(ident, []))
+
+    def chunk_at(self, position: int) -> LoopChunk:
+        """Returns the chunk at `position` without moving the cursor."""
+        return self._all_chunks[position]
+
+    def iter_chunks(self, ident: str | None = None, start: int | None = None,
+                    stop: int | None = None) -> Iterator[LoopChunk]:
+        """Iterates over chunks without consuming them.
+
+        Args:
+            ident (str | None): Only yield chunks with this identifier.
+            start (int | None): First position to visit, defaults to the cursor.
+            stop (int | None): Position to stop at, defaults to the end of the file.
+
+        Yields:
+            LoopChunk: Chunks in file order.
+        """
+        start = self._cursor if start is None else start
+        stop = len(self._all_chunks) if stop is None else stop
+        if ident is None:
+            for position in range(start, stop):
+                yield self._all_chunks[position]
+            return
+        positions = self._positions.get(ident, [])
+        for position in positions[bisect_left(positions, start):bisect_left(positions, stop)]:
+            yield self._all_chunks[position]
+
+    def tell_chunk(self) -> int:
+        """Returns the position of the next chunk to be consumed."""
+        return self._cursor
+
+    def seek_chunk(self, position: int):
+        """Moves the cursor to `position`.
+
+        Args:
+            position (int): Position of the next chunk to consume, between 0 and the chunk count.
+        """
+        if not 0 <= position <= len(self._all_chunks):
+            raise IndexError(f"Chunk position {position} out of range")
+        self._cursor = position
+
+    def __len__(self) -> int:
+        """Returns the number of chunks that were not consumed yet."""
+        return len(self._all_chunks) - self._cursor
 
     def __bool__(self) -> bool:
         """Returns True if there are chunks in the stack"""
-        return len(self.chunk_stack) > 0
+        return self._cursor < len(self._all_chunks)
+
+
+class LoopFileWriter:
+    """Streams an ILFF file into a buffer, one chunk at a time.
+
+    Chunk payloads are written straight into the output buffer, nothing but the offset of the last
+    chunk header is kept in memory. The root header's data_size (total file size) and the last chunk's
+    next_offset are patched when the writer is closed, so the output buffer has to be seekable.
+    """
+
+    HEADER_SIZE = 16
+
+    def __init__(self, buffer: Buffer, container_type: str, flip_ident: bool = False, alignment: int = 4):
+        """Writes the ILFF root header and container type.
+
+        Args:
+            buffer (Buffer): Seekable buffer to write to.
+            container_type (str): Four character container type, e.g. "IRES".
+            flip_ident (bool): Write chunk identifiers reversed, the counterpart of LoopFile's flip_ident.
+            alignment (int): Alignment stored in the root header.
+        """
+        self._buffer = buffer
+        self._flip_ident = flip_ident
+        self._start = buffer.tell()
+        self._last_chunk_offset: int | None = None
+        self._write_header("ILFF", 0, alignment, 0, False)
+        buffer.write(_encode_ident(container_type, False))
+
+    def _write_header(self, ident: str, data_size: int, alignment: int, next_offset: int, flip_ident: bool):
+        self._buffer.write(_encode_ident(ident, flip_ident))
+        self._buffer.write_fmt("3I", data_size, alignment, next_offset)
+
+    def write_chunk(self, ident: str, data, alignment: int = 4) -> int:
+        """Writes a chunk header followed by its payload and alignment padding.
+
+        Args:
+            ident (str): Four character chunk identifier.
+            data: Payload as a bytes-like object, NumPy array or Buffer.
+            alignment (int): Alignment of the end of this chunk.
+
+        Returns:
+            int: Offset of the chunk header in the output buffer.
+        """
+        if isinstance(data, Buffer):
+            data = data.data
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        view = memoryview(data)
+        if view.ndim != 1 or view.format != 'B':
+            view = view.cast('B')
+
+        chunk_offset = self._buffer.tell()
+        end = chunk_offset + self.HEADER_SIZE + view.nbytes
+        padding = (alignment - end % alignment) % alignment
+        self._write_header(ident, view.nbytes, alignment, self.HEADER_SIZE + view.nbytes + padding,
+                           self._flip_ident)
+        self._buffer.write(view)
+        self._buffer.write_padding(padding)
+        self._last_chunk_offset = chunk_offset
+        return chunk_offset
+
+    @contextlib.contextmanager
+    def chunk(self, ident: str, alignment: int = 4):
+        """Streams a chunk of unknown size, the header is patched once the block exits.
+
+        Args:
+            ident (str): Four character chunk identifier.
+            alignment (int): Alignment of the end of this chunk.
+
+        Yields:
+            Buffer: The output buffer, positioned at the start of the payload.
+        """
+        chunk_offset = self._buffer.tell()
+        self._write_header(ident, 0, alignment, 0, self._flip_ident)
+        yield self._buffer
+        end = self._buffer.tell()
+        data_size = end - chunk_offset - self.HEADER_SIZE
+        padding = (alignment - end % alignment) % alignment
+        self._buffer.write_padding(padding)
+        with self._buffer.read_from_offset(chunk_offset + 4):
+            self._buffer.write_fmt("3I", data_size, alignment, self.HEADER_SIZE + data_size + padding)
+        self._last_chunk_offset = chunk_offset
+
+    def close(self):
+        """Patches the root header size and terminates the chunk chain."""
+        end = self._buffer.tell()
+        with self._buffer.save_current_offset():
+            self._buffer.seek(self._start + 4)
+            self._buffer.write_uint32(end - self._start)
+            if self._last_chunk_offset is not None:
+                self._buffer.seek(self._last_chunk_offset + 12)
+                self._buffer.write_uint32(0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+
+def _encode_ident(ident: str, flip_ident: bool) -> bytes:
+    raw = ident.encode("ascii")
+    if len(raw) != 4:
+        raise ValueError(f"Chunk identifier must be 4 characters long, got {ident!r}")
+    return raw[::-1] if flip_ident else raw
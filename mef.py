@@ -1,11 +1,14 @@
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 from enum import IntEnum
+from typing import ClassVar, Sequence
 
 import numpy as np
 
-from igi2cs.file_utils import Buffer
+from igi2cs.file_utils import Buffer, decode_ascii_string
+from igi2cs.io_profiler import io_profiled
 from igi2cs.loop_file import LoopFile
+from igi2cs.record_schema import RecordSchema
 
 
 class UnsupportedModelType(Exception):
@@ -97,19 +100,23 @@ class ModelInfo:
     field_00: int
     field_001: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(
+        ("version", "f"), ("creation_time", "7I"), ("model_type", "I"), ("unk", "3i"), ("spheres", "12f"),
+        ("render_mesh_info", "3I"), ("collision_mesh_info", "3I"),
+        ("field_74", "f"), ("field_80", "H"), ("attachment_count", "H"), ("field_84", "H"), ("field_86", "H"),
+        ("glow_count", "H"), ("bone_count", "H"),
+        ("field_8C", "I"), ("field_90", "I"), ("field_94", "I"), ("field_98", "I"), ("field_9C", "I"),
+        ("field_A0", "I"), ("field_A4", "I"), ("field_A8", "I"), ("field_00", "I"), ("field_001", "I"),
+    )
+
     @classmethod
     def from_buffer(cls, buffer: Buffer):
-        return ModelInfo(buffer.read_float(), DateTime.from_buffer(buffer), ModelType(buffer.read_uint32()),
-                         buffer.read_fmt("3i"),
-                         (Sphere.from_buffer(buffer), Sphere.from_buffer(buffer), Sphere.from_buffer(buffer)),
-                         MeshInfo.from_buffer(buffer), MeshInfo.from_buffer(buffer),
-                         buffer.read_float(), buffer.read_uint16(), buffer.read_uint16(), buffer.read_uint16(),
-                         buffer.read_uint16(), buffer.read_uint16(), buffer.read_uint16(),
-                         buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                         buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                         buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                         buffer.read_uint32()
-                         )
+        (version, creation_time, model_type, unk, spheres,
+         render_mesh_info, collision_mesh_info, *rest) = cls.schema.read(buffer)
+        return ModelInfo(version, DateTime(*creation_time), ModelType(model_type), unk,
+                         tuple(Sphere(Vector3(*spheres[i:i + 3]), spheres[i + 3]) for i in range(0, 12, 4)),
+                         MeshInfo(*render_mesh_info), MeshInfo(*collision_mesh_info),
+                         *rest)
 
 
 @dataclass(slots=True)
@@ -129,30 +136,29 @@ class RenderMeshHeader:
     dword24: int
     dword28: int
 
+    schemas: ClassVar[dict[int, RecordSchema]] = {
+        44: RecordSchema(("dword0", "I"), ("lightmap_count", "I"), ("face_count", "I"), ("face_group_count", "I"),
+                         ("vertex_count", "I"), ("dword14", "I"), ("dword18", "I"), ("dword1c", "I"),
+                         ("dword20", "I"), ("dword24", "I"), ("dword28", "I")),
+        40: RecordSchema(("lightmap_count", "I"), ("face_count", "I"), ("face_group_count", "I"),
+                         ("bone_related_0", "I"), ("bone_related_1", "I"),
+                         ("vertex_count", "I"), ("dword14", "I"), ("dword18", "I"), ("dword1c", "I"),
+                         ("dword20", "I")),
+        36: RecordSchema(("dword0", "I"), ("face_count", "I"), ("face_group_count", "I"),
+                         ("vertex_count", "I"), ("dword14", "I"), ("dword18", "I"), ("dword1c", "I"),
+                         ("dword20", "I")),
+    }
+
     @classmethod
     def from_buffer(cls, buffer: Buffer):
         size = buffer.size()
-        if size == 44:
-            return RenderMeshHeader(44, buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(),
-                                    0, 0,
-                                    buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(),
-                                    buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32()
-                                    )
-        elif size == 40:
-            return RenderMeshHeader(40, 0, buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(),
-                                    buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(),
-                                    0, 0
-                                    )
-        elif size == 36:
-            return RenderMeshHeader(36, buffer.read_uint32(), 0, buffer.read_uint32(), buffer.read_uint32(), 0, 0,
-                                    buffer.read_uint32(), buffer.read_uint32(), buffer.read_uint32(),
-                                    buffer.read_uint32(),
-                                    buffer.read_uint32(), 0, 0)
+        schema = cls.schemas.get(size)
+        if schema is None:
+            return None
+        values = {f.name: 0 for f in fields(cls)}
+        values.update(schema.read_dict(buffer))
+        values["type"] = size
+        return RenderMeshHeader(**values)
 
 
 @dataclass(slots=True)
@@ -207,14 +213,18 @@ class FaceGroup:
     vertex_offset: int
     vertex_count: int
 
-    @classmethod
-    def from_buffer(cls, buffer: Buffer, model_type: ModelType):
+    @staticmethod
+    def class_for_model_type(model_type: ModelType) -> type['FaceGroup']:
         if model_type == ModelType.SkinnedModel or model_type == ModelType.StaticModel:
-            return SkinnedFaceGroup.from_buffer(buffer, model_type)
+            return SkinnedFaceGroup
         elif model_type == ModelType.LightmappedModel:
-            return LightmapFaceGroup.from_buffer(buffer, model_type)
+            return LightmapFaceGroup
         else:
-            raise NotImplementedError("Unsupported model type: {model_type}")
+            raise NotImplementedError(f"Unsupported model type: {model_type}")
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer, model_type: ModelType):
+        return FaceGroup.class_for_model_type(model_type).from_buffer(buffer, model_type)
 
 
 @dataclass(slots=True)
@@ -225,13 +235,18 @@ class SkinnedFaceGroup(FaceGroup):
     reflection_scale: int
     bump_scale: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(
+        ("transparency", "B"), ("shininess", "B"), ("unk0", "B"), ("unk1", "B"), ("scaled_vertex_sum", "3f"),
+        ("index_offset", "H"), ("face_count", "H"), ("vertex_offset", "H"), ("vertex_count", "H"),
+        ("diffuse_texture", "h"), ("bump_texture", "h"), ("reflection_texture", "h"),
+        ("reflection_scale", "B"), ("bump_scale", "B"),
+    )
+
     @classmethod
     def from_buffer(cls, buffer: Buffer, model_type: ModelType):
         assert model_type == ModelType.SkinnedModel or model_type == ModelType.StaticModel
-        return SkinnedFaceGroup(buffer.read_uint8(), buffer.read_uint8(), buffer.read_uint8(), buffer.read_uint8(),
-                                Vector3.from_buffer(buffer), buffer.read_uint16(), buffer.read_uint16(),
-                                buffer.read_uint16(), buffer.read_uint16(), buffer.read_int16(), buffer.read_int16(),
-                                buffer.read_int16(), buffer.read_uint8(), buffer.read_uint8())
+        transparency, shininess, unk0, unk1, scaled_vertex_sum, *rest = cls.schema.read(buffer)
+        return SkinnedFaceGroup(transparency, shininess, unk0, unk1, Vector3(*scaled_vertex_sum), *rest)
 
 
 @dataclass(slots=True)
@@ -239,12 +254,17 @@ class LightmapFaceGroup(FaceGroup):
     diffuse_texture: int
     bump_texture: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(
+        ("transparency", "B"), ("shininess", "B"), ("unk0", "B"), ("unk1", "B"), ("scaled_vertex_sum", "3f"),
+        ("index_offset", "H"), ("face_count", "H"), ("vertex_offset", "H"), ("vertex_count", "H"),
+        ("diffuse_texture", "h"), ("bump_texture", "h"),
+    )
+
     @classmethod
     def from_buffer(cls, buffer: Buffer, model_type: ModelType):
         assert model_type == ModelType.LightmappedModel
-        return LightmapFaceGroup(buffer.read_uint8(), buffer.read_uint8(), buffer.read_uint8(), buffer.read_uint8(),
-                                 Vector3.from_buffer(buffer), buffer.read_uint16(), buffer.read_uint16(),
-                                 buffer.read_uint16(), buffer.read_uint16(), buffer.read_int16(), buffer.read_int16())
+        transparency, shininess, unk0, unk1, scaled_vertex_sum, *rest = cls.schema.read(buffer)
+        return LightmapFaceGroup(transparency, shininess, unk0, unk1, Vector3(*scaled_vertex_sum), *rest)
 
 
 @dataclass(slots=True)
@@ -262,11 +282,14 @@ class Attachment:
     unk: int
     bone_id: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(
+        ("name", "16s"), ("pos", "3f"), ("rot_mat", "9f"), ("unk", "I"), ("bone_id", "I"),
+    )
+
     @classmethod
     def from_buffer(cls, buffer: Buffer):
-        return Attachment(buffer.read_ascii_string(16), Vector3.from_buffer(buffer),
-                          buffer.read_fmt("9f"),
-                          buffer.read_uint32(), buffer.read_uint32())
+        name, pos, rot_mat, unk, bone_id = cls.schema.read(buffer)
+        return Attachment(decode_ascii_string(name), Vector3(*pos), rot_mat, unk, bone_id)
 
 
 @dataclass(slots=True)
@@ -274,7 +297,7 @@ class RenderMeshData:
     mesh_header: RenderMeshHeader
     faces: np.ndarray = field(repr=False)
     vertices: np.ndarray = field(repr=False)
-    primitives: list[SkinnedFaceGroup] = field(default_factory=list)
+    primitives: Sequence[FaceGroup] = field(default_factory=list)
 
 
 CollisionSphereDtype = np.dtype([
@@ -326,6 +349,7 @@ MorphVertexDtype = np.dtype([
 
 
 class MefModel:
+    @io_profiled
     def __init__(self, buffer: Buffer):
         loop_file = LoopFile(buffer, flip_ident=True)
 
@@ -370,7 +394,7 @@ class MefModel:
         for channel in range(16):
             counts.append(buffer.read_uint32())
         for channel, vertex_count in enumerate(counts):
-            vertices = np.frombuffer(buffer.read(MorphVertexDtype.itemsize * vertex_count), MorphVertexDtype)
+            vertices = buffer.read_array(MorphVertexDtype, vertex_count)
             self.morph_channels[channel] = vertices
         del buffer, vertices, vertex_count, counts, channel
 
@@ -379,9 +403,9 @@ class MefModel:
         vertex_chunk = loop_file.expect_chunk("SVTX")
         face_chunk = loop_file.expect_chunk("SFAC")
         edge_chunk = loop_file.expect_chunk("EDGE")
-        vertices = np.frombuffer(vertex_chunk.buffer.read(), np.float32).reshape(-1, 3)
-        faces = np.frombuffer(face_chunk.buffer.read(), ShadowFaceDtype)
-        edges = np.frombuffer(edge_chunk.buffer.read(), np.uint32).reshape(-1, 2)
+        vertices = np.frombuffer(vertex_chunk.buffer.read_view(), np.float32).reshape(-1, 3)
+        faces = np.frombuffer(face_chunk.buffer.read_view(), ShadowFaceDtype)
+        edges = np.frombuffer(edge_chunk.buffer.read_view(), np.uint32).reshape(-1, 2)
         self.shadow_mesh_data = ShadowMeshData(shadow_mesh, faces, vertices, edges)
         del vertex_chunk, face_chunk, edge_chunk, vertices, faces, edges
 
@@ -418,8 +442,9 @@ class MefModel:
         face_chunk = loop_file.expect_chunk("FACE")
         faces = np.frombuffer(face_chunk.buffer.data, np.uint16).reshape(-1, 3)
         rend_chunk = loop_file.expect_chunk("REND")
-        render_info = [FaceGroup.from_buffer(rend_chunk.buffer, self.model_info.model_type) for _ in
-                       range(render_mesh_info.face_group_count)]
+        model_type = self.model_info.model_type
+        render_info = rend_chunk.buffer.read_structure_array(0, render_mesh_info.face_group_count,
+                                                             FaceGroup.class_for_model_type(model_type), model_type)
         vert_chunk = loop_file.expect_chunk("VRTX")
         if self.model_info.model_type == ModelType.StaticModel:
             dtype = np.dtype([
@@ -0,0 +1,187 @@
+import os
+import posixpath
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Optional, TypeVar, Union
+
+from igi2cs.asset_cache import AssetCache
+from igi2cs.mef import FaceGroup, MefModel
+from igi2cs.res import normalize_res_name, res_entry_path
+from igi2cs.tex import TexTexture
+from igi2cs.vfs import VfsEntry, VirtualFileSystem, normalize_path
+
+T = TypeVar("T")
+
+TEXTURE_ROLES = ("diffuse", "bump", "reflection")
+
+
+@dataclass(slots=True)
+class ModelDependencies:
+    model: VfsEntry
+    texture_names: list[str]
+    # None for textures that are not in the file system.
+    textures: dict[str, Optional[VfsEntry]]
+    # Why the texture names could not be looked up, the model is loaded without textures then.
+    lookup_error: Optional[Exception] = None
+
+
+@dataclass(slots=True)
+class ModelBundle:
+    path: str
+    model: MefModel
+    texture_names: list[str]
+    textures: dict[str, TexTexture] = field(default_factory=dict)
+    rgba: dict[str, bytes] = field(default_factory=dict)
+    missing: list[str] = field(default_factory=list)
+    errors: dict[str, Exception] = field(default_factory=dict)
+    lookup_error: Optional[Exception] = None
+
+    def face_group_textures(self, face_group: FaceGroup) -> dict[str, Optional[TexTexture]]:
+        """Diffuse, bump and reflection textures of a face group, None for unused or unavailable slots."""
+        textures = {}
+        for role in TEXTURE_ROLES:
+            index = getattr(face_group, f"{role}_texture", -1)
+            name = self.texture_names[index] if 0 <= index < len(self.texture_names) else None
+            textures[role] = self.textures.get(name) if name is not None else None
+        return textures
+
+
+class ModelLoader:
+    """Loads a model together with the textures its MTP entry lists.
+
+    The texture names are known from the MTP before the model is parsed, so the .mef and all of its
+    .tex files are fetched and decoded at the same time on a thread pool. Decoded assets go through
+    `cache` when one is given. load_sequential does the same work one node after another.
+    """
+
+    def __init__(self, vfs: VirtualFileSystem, cache: Optional[AssetCache] = None,
+                 max_workers: Optional[int] = None):
+        self._vfs = vfs
+        self._content_manager = vfs.content_manager
+        self._cache = cache
+        self._pool = ThreadPoolExecutor(max_workers or min(32, (os.cpu_count() or 1) + 4))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def dependencies(self, model_path: Union[str, Path]) -> ModelDependencies:
+        entry = self._vfs.get_entry(model_path)
+        if entry is None:
+            raise FileNotFoundError(f"{model_path} not found")
+        if entry.res_entry is not None:
+            # MTP model names are matched case-sensitively, so the entry name keeps its case.
+            file_path = entry.source.parent / res_entry_path(entry.res_entry.name)
+        else:
+            file_path = entry.source
+        lookup_error = None
+        try:
+            texture_names = self._content_manager.get_texture_names(file_path)
+            if texture_names is None:
+                lookup_error = LookupError(f"No MTP file covers {file_path}")
+        except ValueError as error:
+            # The model has no entry in its MTP.
+            texture_names = None
+            lookup_error = error
+        texture_names = texture_names or []
+        textures = {name: self._resolve_texture(name, entry.path) for name in dict.fromkeys(texture_names)}
+        return ModelDependencies(entry, texture_names, textures, lookup_error)
+
+    def _resolve_texture(self, name: str, model_path: str) -> Optional[VfsEntry]:
+        file_name = normalize_path(name)
+        if not file_name.endswith(".tex"):
+            file_name += ".tex"
+        candidates = self._vfs.find_file_name(file_name)
+        if not candidates:
+            return None
+        # Prefer the copy closest to the model, then the one mounted last.
+        model_parts = posixpath.dirname(model_path).split("/")
+
+        def closeness(item: tuple[int, str]) -> tuple[int, int]:
+            position, path = item
+            common = 0
+            for a, b in zip(model_parts, posixpath.dirname(path).split("/")):
+                if a != b:
+                    break
+                common += 1
+            return common, position
+
+        return self._vfs.get_entry(max(enumerate(candidates), key=closeness)[1])
+
+    def _decode(self, entry: VfsEntry, kind: str, decode: Callable[[], T]) -> T:
+        if self._cache is None:
+            return decode()
+        if entry.res_entry is not None:
+            # Same keys as AssetCache.model/texture/rgba, so both share cached assets.
+            key = (entry.source, normalize_res_name(entry.res_entry.name), kind)
+            archive = self._content_manager.get_archive(entry.source)
+        else:
+            key = (entry.source, "", kind)
+            archive = None
+        return self._cache.get_or_load(key, decode, archive)
+
+    def _load_model(self, entry: VfsEntry) -> MefModel:
+        return self._decode(entry, "mef", lambda: MefModel(entry.open()))
+
+    def _load_texture(self, entry: VfsEntry, rgba: bool) -> tuple[TexTexture, Optional[bytes]]:
+        texture = self._decode(entry, "tex", lambda: TexTexture(entry.open()))
+        if not rgba:
+            return texture, None
+        return texture, self._decode(entry, "rgba", texture.convert_to_rgba)
+
+    @staticmethod
+    def _bundle(dependencies: ModelDependencies, model: MefModel,
+                results: dict[str, Union[Future, tuple[TexTexture, Optional[bytes]], Exception]]) -> ModelBundle:
+        bundle = ModelBundle(dependencies.model.path, model, dependencies.texture_names,
+                             lookup_error=dependencies.lookup_error)
+        for name, entry in dependencies.textures.items():
+            result = results.get(name)
+            if isinstance(result, Future):
+                error = result.exception()
+                result = error if error is not None else result.result()
+            if entry is None:
+                bundle.missing.append(name)
+            elif isinstance(result, Exception):
+                bundle.errors[name] = result
+            else:
+                texture, rgba = result
+                bundle.textures[name] = texture
+                if rgba is not None:
+                    bundle.rgba[name] = rgba
+        return bundle
+
+    def load(self, model_path: Union[str, Path], rgba: bool = False) -> ModelBundle:
+        return self.load_many([model_path], rgba)[0]
+
+    def load_many(self, model_paths: Iterable[Union[str, Path]], rgba: bool = False) -> list[ModelBundle]:
+        """Loads several models at once, textures shared between them are decoded once."""
+        all_dependencies = [self.dependencies(model_path) for model_path in model_paths]
+        model_futures = [self._pool.submit(self._load_model, dependencies.model) for dependencies in all_dependencies]
+        texture_futures: dict[str, Future] = {}
+        for dependencies in all_dependencies:
+            for entry in dependencies.textures.values():
+                if entry is not None and entry.path not in texture_futures:
+                    texture_futures[entry.path] = self._pool.submit(self._load_texture, entry, rgba)
+        return [self._bundle(dependencies, model_future.result(),
+                             {name: texture_futures[entry.path] for name, entry in dependencies.textures.items()
+                              if entry is not None})
+                for dependencies, model_future in zip(all_dependencies, model_futures)]
+
+    def load_sequential(self, model_path: Union[str, Path], rgba: bool = False) -> ModelBundle:
+        dependencies = self.dependencies(model_path)
+        model = self._load_model(dependencies.model)
+        results = {}
+        for name, entry in dependencies.textures.items():
+            if entry is None:
+                continue
+            try:
+                results[name] = self._load_texture(entry, rgba)
+            except Exception as error:
+                results[name] = error
+        return self._bundle(dependencies, model, results)
@@ -1,6 +1,11 @@
 from dataclasses import dataclass
+from typing import ClassVar, Iterable, Optional, Sequence
 
-from igi2cs.file_utils import Buffer
+import numpy as np
+
+from igi2cs.file_utils import Buffer, StructureArray
+from igi2cs.io_profiler import io_profiled
+from igi2cs.record_schema import RecordSchema
 
 
 @dataclass(slots=True)
@@ -27,26 +32,131 @@ class MTPInstance:
         return cls(model_id, texture_info_ids)
 
 
+class MTPInstanceArray(Sequence):
+    """INST records decoded in bulk into flat arrays.
+
+    Instance i places model `model_ids[i]` with texture infos `texture_info_ids[offsets[i]:offsets[i + 1]]`.
+    Indexing returns MTPInstance objects, created on first access.
+    """
+
+    def __init__(self, model_ids: np.ndarray, offsets: np.ndarray, texture_info_ids: np.ndarray):
+        self.model_ids = model_ids
+        self.offsets = offsets
+        self.texture_info_ids = texture_info_ids
+        self._objects: list[Optional[MTPInstance]] = [None] * len(model_ids)
+
+    @classmethod
+    def empty(cls) -> 'MTPInstanceArray':
+        return cls(np.empty(0, np.uint32), np.zeros(1, np.int64), np.empty(0, np.uint32))
+
+    @classmethod
+    def from_buffer(cls, buffer: Buffer) -> 'MTPInstanceArray':
+        words = buffer.read_array(np.uint32, (buffer.size() - buffer.tell()) // 4)
+        # The loop only visits record headers, the ids are converted to Python ints in one tolist call
+        # since indexing the array word by word would be slower.
+        values = words.tolist()
+        starts = []
+        position = 0
+        while position < len(values):
+            if position + 1 >= len(values):
+                raise BufferError(f"INST record header at {position * 4} runs past the end of the chunk")
+            starts.append(position)
+            position += 2 + values[position + 1]
+        if position != len(values):
+            raise BufferError(f"INST record at {starts[-1] * 4} runs past the end of the chunk")
+        starts = np.array(starts, np.int64)
+        offsets = np.zeros(len(starts) + 1, np.int64)
+        np.cumsum(words[starts + 1], out=offsets[1:])
+        is_id = np.ones(len(words), bool)
+        is_id[starts] = False
+        is_id[starts + 1] = False
+        return cls(words[starts], offsets, words[is_id])
+
+    def concatenate(self, other: 'MTPInstanceArray') -> 'MTPInstanceArray':
+        """Returns the instances of both arrays, `other` following this one."""
+        if not len(self):
+            return other
+        if not len(other):
+            return self
+        return MTPInstanceArray(np.concatenate([self.model_ids, other.model_ids]),
+                                np.concatenate([self.offsets, other.offsets[1:] + self.offsets[-1]]),
+                                np.concatenate([self.texture_info_ids, other.texture_info_ids]))
+
+    def texture_info_ids_of(self, index: int) -> np.ndarray:
+        return self.texture_info_ids[self.offsets[index]:self.offsets[index + 1]]
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError("MTPInstanceArray index out of range")
+        instance = self._objects[index]
+        if instance is None:
+            instance = self._objects[index] = MTPInstance(int(self.model_ids[index]),
+                                                          self.texture_info_ids_of(index).tolist())
+        return instance
+
+    def __repr__(self) -> str:
+        return f'<MTPInstanceArray [{len(self)}]>'
+
+
 @dataclass(slots=True)
 class MTPIndex:
     index: int
     flags: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(("index", "I"), ("flags", "i"))
+
     @classmethod
     def from_buffer(cls, buffer: Buffer):
-        return MTPIndex(buffer.read_uint32(), buffer.read_int32())
+        return MTPIndex(*cls.schema.read(buffer))
+
+
+# Chunk name -> attribute holding its decoded contents.
+SECTION_ATTRIBUTES = {
+    "BANM": "animations",
+    "SNDS": "sounds",
+    "SVOL": "sound_volumes",
+    "MODS": "models",
+    "VNAM": "vnam",
+    "INST": "instances",
+    "TEXF": "textures",
+    "GTT ": "texture_infos",
+}
+# Sections needed by get_texture_names.
+TEXTURE_SECTIONS = ("MODS", "INST", "TEXF", "GTT ")
 
 
 class MTPFile:
-    def __init__(self, buffer: Buffer):
+    @io_profiled
+    def __init__(self, buffer: Buffer, sections: Optional[Iterable[str]] = None):
+        """Parses an MTP file.
+
+        With `sections` (chunk names, see SECTION_ATTRIBUTES) only those sections are decoded right away,
+        the other ones keep a slice of their chunk and are decoded when their attribute is first read.
+        """
+        if sections is not None:
+            sections = set(sections)
+            unknown = sections - SECTION_ATTRIBUTES.keys()
+            if unknown:
+                raise ValueError(f"Unknown MTP sections {sorted(unknown)}")
         self.animations: list[str] = []
         self.sounds: list[str] = []
         self.sound_volumes: list[str] = []
         self.models: list[str] = []
         self.vnam: list[tuple[int, str]] = []
-        self.instances: list[MTPInstance] = []
+        self.instances: MTPInstanceArray = MTPInstanceArray.empty()
         self.textures: list[str] = []
-        self.texture_infos: list[MTPIndex] = []
+        self.texture_infos: Sequence[MTPIndex] = []
+        # Payload offset and size of every chunk, by chunk name, including chunks that are not decoded.
+        self.chunk_offsets: dict[str, list[tuple[int, int]]] = {}
+        self._pending: dict[str, list[Buffer]] = {}
+        self._texture_lookup: Optional[_TextureLookup] = None
 
         root_chunk = MTPChunk.from_buffer(buffer)
         if root_chunk.name != "FORM":
@@ -60,54 +170,142 @@ class MTPFile:
             chunk = MTPChunk.from_buffer(buffer)
             buffer.set_little_endian()
             if chunk.size > 0:
+                self.chunk_offsets.setdefault(chunk.name, []).append((buffer.tell(), chunk.size))
                 chunk_data = buffer.slice(size=chunk.size)
                 buffer.skip(chunk.size)
                 buffer.align(4)
-                if chunk.name == "BANM":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.animations.append(chunk_data.read_ascii_string())
-                elif chunk.name == "SNDS":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.sounds.append(chunk_data.read_ascii_string())
-                elif chunk.name == "SVOL":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.sound_volumes.append(chunk_data.read_ascii_string())
-                elif chunk.name == "MODS":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.models.append(chunk_data.read_ascii_string())
-                elif chunk.name == "VNAM":
-                    count = chunk_data.read_uint32()
-                    ints = [chunk_data.read_uint32() for _ in range(count)]
-                    strings = [chunk_data.read_ascii_string() for _ in range(count)]
-                    self.vnam.extend(zip(ints, strings))
-                elif chunk.name == "INST":
-                    while chunk_data:
-                        self.instances.append(MTPInstance.from_buffer(chunk_data))
-                elif chunk.name == "TEXF":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.textures.append(chunk_data.read_ascii_string())
-                elif chunk.name == "PALF":
+                if chunk.name == "PALF":
                     count = chunk_data.read_uint32()
                     assert count == 0
-                elif chunk.name == "GTT ":
-                    count = chunk_data.read_uint32()
-                    for _ in range(count):
-                        self.texture_infos.append(MTPIndex.from_buffer(chunk_data))
-                else:
-                    print(f"Unhandled MTP chunk {chunk}")
+                elif chunk.name in SECTION_ATTRIBUTES:
+                    if sections is None or chunk.name in sections:
+                        attribute = SECTION_ATTRIBUTES[chunk.name]
+                        setattr(self, attribute, self._decode_section(chunk.name, chunk_data,
+                                                                      getattr(self, attribute)))
+                    else:
+                        self._pending.setdefault(chunk.name, []).append(chunk_data)
+        # Lazy sections are resolved by __getattr__, so their attributes must not exist yet.
+        for name in self._pending:
+            delattr(self, SECTION_ATTRIBUTES[name])
+
+    @staticmethod
+    def _decode_section(name: str, chunk_data: Buffer, current):
+        if name == "INST":
+            return current.concatenate(MTPInstanceArray.from_buffer(chunk_data))
+        count = chunk_data.read_uint32()
+        if name == "GTT ":
+            # Records of several GTT chunks form one table, texture info ids index into all of them.
+            texture_infos = chunk_data.read_structure_array(chunk_data.tell(), count, MTPIndex)
+            if not isinstance(current, StructureArray) or not len(texture_infos):
+                return texture_infos or current
+            records = np.concatenate([current.records, texture_infos.records])
+            return StructureArray(records, memoryview(records.tobytes()), MTPIndex, '<')
+        if name == "VNAM":
+            ints = chunk_data.read_fmt(f"{count}I")
+            return current + list(zip(ints, chunk_data.read_cstring_table(count)))
+        # Model and texture names are looked up a lot, interning makes those comparisons cheap.
+        return current + chunk_data.read_cstring_table(count, intern=name in ("MODS", "TEXF"))
+
+    def __getattr__(self, attribute: str):
+        pending = self.__dict__.get("_pending")
+        if pending:
+            for name, chunks in list(pending.items()):
+                if SECTION_ATTRIBUTES[name] == attribute:
+                    value = MTPInstanceArray.empty() if name == "INST" else []
+                    for chunk_data in chunks:
+                        value = self._decode_section(name, chunk_data, value)
+                    # Published in one assignment, a concurrent reader decodes it again at worst.
+                    setattr(self, attribute, value)
+                    pending.pop(name, None)
+                    return value
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {attribute!r}")
+
+    def to_summary(self) -> dict:
+        return {
+            "animations": self.animations,
+            "sounds": self.sounds,
+            "sound_volumes": self.sound_volumes,
+            "models": self.models,
+            "vnam": [[value, name] for value, name in self.vnam],
+            "instances": {
+                "model_ids": self.instances.model_ids.tolist(),
+                "offsets": self.instances.offsets.tolist(),
+                "texture_info_ids": self.instances.texture_info_ids.tolist(),
+            },
+            "textures": self.textures,
+            "texture_infos": {
+                "index": self.texture_info_array["index"].tolist(),
+                "flags": self.texture_info_array["flags"].tolist(),
+            },
+        }
+
+    @classmethod
+    def from_summary(cls, summary: dict) -> 'MTPFile':
+        mtp = cls.__new__(cls)
+        mtp.chunk_offsets = {}
+        mtp._pending = {}
+        mtp.animations = summary["animations"]
+        mtp.sounds = summary["sounds"]
+        mtp.sound_volumes = summary["sound_volumes"]
+        mtp.models = summary["models"]
+        mtp.vnam = [(value, name) for value, name in summary["vnam"]]
+        instances = summary["instances"]
+        mtp.instances = MTPInstanceArray(np.array(instances["model_ids"], np.uint32),
+                                         np.array(instances["offsets"], np.int64),
+                                         np.array(instances["texture_info_ids"], np.uint32))
+        mtp.textures = summary["textures"]
+        texture_infos = summary["texture_infos"]
+        records = np.empty(len(texture_infos["index"]), MTPIndex.schema.dtype)
+        records["index"] = texture_infos["index"]
+        records["flags"] = texture_infos["flags"]
+        mtp.texture_infos = StructureArray(records, memoryview(records.tobytes()), MTPIndex, '<') if len(records) else []
+        mtp._texture_lookup = None
+        return mtp
+
+    @property
+    def texture_info_array(self) -> np.ndarray:
+        """GTT records as a structured array with `index` and `flags` fields."""
+        if isinstance(self.texture_infos, StructureArray):
+            return self.texture_infos.records
+        return np.empty(0, MTPIndex.schema.dtype)
+
+    def _build_texture_lookup(self) -> '_TextureLookup':
+        # Same resolution as a linear search: first model with the name, first instance of that model.
+        instances = self.instances
+        model_ids, first_instances = np.unique(instances.model_ids, return_index=True)
+        first_instance = dict(zip(model_ids.tolist(), first_instances.tolist()))
+        model_count = len(self.models)
+        # Built back to front, so the first model with a name is the one that stays in the dict.
+        instance_of_model = {model_name: first_instance.get(model_index, -1) for model_name, model_index in
+                             zip(reversed(self.models), range(model_count - 1, -1, -1))}
+        # Ids past the GTT table are marked with -1, they only break the lookups of their own models.
+        gtt_indices = self.texture_info_array["index"].astype(np.int64)
+        texture_info_ids = instances.texture_info_ids
+        valid = texture_info_ids < len(gtt_indices)
+        texture_indices = np.full(len(texture_info_ids), -1, np.int64)
+        texture_indices[valid] = gtt_indices[texture_info_ids[valid]]
+        return _TextureLookup(instance_of_model, instances.offsets.tolist(), texture_indices)
 
     def get_texture_names(self, model_name: str):
-        model_index = self.models.index(model_name)
-        instance = next(filter(lambda x: x.model_id == model_index, self.instances), None)
+        if self._texture_lookup is None:
+            self._texture_lookup = self._build_texture_lookup()
+        lookup = self._texture_lookup
+        instance = lookup.instance_of_model.get(model_name)
         if instance is None:
+            raise ValueError(f"{model_name!r} is not in list")
+        if instance < 0:
             return []
-        texture_names = []
-        for texture_info_id in instance.texture_info_ids:
-            texture_info = self.texture_infos[texture_info_id]
-            texture_names.append(self.textures[texture_info.index])
-        return texture_names
+        texture_indices = lookup.texture_indices[lookup.offsets[instance]:lookup.offsets[instance + 1]].tolist()
+        if -1 in texture_indices:
+            raise IndexError(f"{model_name!r} uses a texture info id past the end of the GTT table")
+        textures = self.textures
+        return [textures[texture_index] for texture_index in texture_indices]
+
+
+@dataclass(slots=True)
+class _TextureLookup:
+    # Model name -> position of its first instance, -1 for models without one.
+    instance_of_model: dict[str, int]
+    offsets: list[int]
+    # Texture index for every entry of MTPInstanceArray.texture_info_ids, -1 for ids past the GTT table.
+    texture_indices: np.ndarray
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 
 from igi2cs.file_utils import Buffer
+from igi2cs.io_profiler import io_profiled
 
 
 @dataclass
@@ -10,6 +11,7 @@ class QVMScript:
     code: bytes
 
 
+@io_profiled
 def load_qvm(name: str, buffer: Buffer) -> QVMScript:
     (ident, *version, string_table_offset, strings_offset, string_count, strings_size,
      name_table_offset, names_offset, name_count, names_size,
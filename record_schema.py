@@ -0,0 +1,64 @@
+import struct
+
+import numpy as np
+
+from igi2cs.file_utils import Buffer
+
+_NUMPY_TYPES = {
+    'b': 'i1', 'B': 'u1',
+    'h': 'i2', 'H': 'u2',
+    'i': 'i4', 'I': 'u4',
+    'q': 'i8', 'Q': 'u8',
+    'f': 'f4', 'd': 'f8',
+}
+
+
+class RecordSchema:
+    """Binary layout of a fixed-size record, compiled into one struct unpack and a matching NumPy dtype.
+
+    Fields are declared as ``(name, format)`` pairs where format is a single struct type code with an
+    optional repeat count, e.g. ``"I"``, ``"3f"`` or ``"16s"``. Repeated numeric fields are returned as
+    tuples, ``s`` fields as raw bytes.
+    """
+
+    def __init__(self, *fields: tuple[str, str]):
+        self.names = tuple(name for name, _ in fields)
+        self.format = ''.join(fmt for _, fmt in fields)
+        self.size = struct.calcsize('<' + self.format)
+
+        spans = []
+        dtype_fields = []
+        position = 0
+        for name, fmt in fields:
+            code = fmt[-1]
+            count = int(fmt[:-1]) if len(fmt) > 1 else 1
+            if code == 's':
+                dtype_fields.append((name, f'S{count}'))
+                spans.append((position, 0))
+                position += 1
+            elif code in _NUMPY_TYPES:
+                if count > 1:
+                    dtype_fields.append((name, '<' + _NUMPY_TYPES[code], (count,)))
+                    spans.append((position, count))
+                else:
+                    dtype_fields.append((name, '<' + _NUMPY_TYPES[code]))
+                    spans.append((position, 0))
+                position += count
+            else:
+                raise ValueError(f"Unsupported field format {fmt!r} for {name!r}")
+        # Records made only of scalar fields can return the unpacked tuple as is.
+        self._spans = tuple(spans) if any(count for _, count in spans) else None
+        self.dtype = np.dtype(dtype_fields)
+        assert self.dtype.itemsize == self.size
+
+    def read(self, buffer: Buffer) -> tuple:
+        values = buffer.read_struct(self.format)
+        if self._spans is None:
+            return values
+        return tuple(values[i] if count == 0 else values[i:i + count] for i, count in self._spans)
+
+    def read_dict(self, buffer: Buffer) -> dict:
+        return dict(zip(self.names, self.read(buffer)))
+
+    def __repr__(self) -> str:
+        return f'<RecordSchema {self.format!r} {self.size} bytes>'
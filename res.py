@@ -1,47 +1,285 @@
+import hashlib
+import os
+import time
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
 
-from igi2cs.file_utils import Buffer
-from igi2cs.loop_file import LoopFile
+import numpy as np
+
+from igi2cs.file_utils import Buffer, FileBuffer, MappedBuffer, MemoryBuffer
+from igi2cs.io_profiler import io_profiled
+from igi2cs.loop_file import LoopFile, LoopChunk, LoopFileWriter
+from igi2cs.loop_header import FFLIHeader
+
+
+def res_entry_path(name: str) -> str:
+    """Relative path of an entry, without the LOCAL: prefix and with forward slashes, case is kept."""
+    if name.startswith("LOCAL:"):
+        name = name[6:]
+    return name.replace("\\", "/")
+
+
+def normalize_res_name(name: str) -> str:
+    return res_entry_path(name).lower()
 
 
 @dataclass(slots=True)
 class ResEntry:
     name: str
-    data: Buffer
+    chunk: LoopChunk
+
+    @property
+    def data(self) -> Buffer:
+        return self.chunk.buffer
+
+    @property
+    def size(self) -> int:
+        return self.chunk.header.data_size
+
+    def open(self) -> MemoryBuffer:
+        """Returns a buffer with its own read position over the body, `data` is shared by all readers."""
+        return MemoryBuffer(self.chunk.buffer.data)
 
 
 class ResArchive:
-    def __init__(self, buffer: Buffer):
-        loop_file = LoopFile(buffer, flip_ident=False)
+    @io_profiled
+    def __init__(self, buffer: Buffer, lazy: bool = False):
+        # In lazy mode bodies are read from the buffer on access, so it has to stay open.
+        loop_file = LoopFile(buffer, flip_ident=False, lazy=lazy)
         if not loop_file.is_container_for("IRES"):
             raise Exception("Not a RES loop file")
         all_names = []
-        self.files = []
+        self.files: list[ResEntry] = []
+        self._index: dict[str, ResEntry] = {}
         if loop_file:
             while loop_file:
                 name_chunk = loop_file.expect_chunk("NAME")
                 data_chunk = loop_file.next_chunk()
-                if data_chunk.ident == "BODY":
-                    self.files.append(
-                        ResEntry(name_chunk.buffer.read_ascii_string(name_chunk.buffer.remaining()), data_chunk.buffer))
-                elif data_chunk.ident == "CSTR":
-                    self.files.append(
-                        ResEntry(name_chunk.buffer.read_ascii_string(name_chunk.buffer.remaining()), data_chunk.buffer))
+                name = name_chunk.buffer.read_cstring_table(1, intern=True)[0]
+                if data_chunk.ident == "BODY" or data_chunk.ident == "CSTR":
+                    self._add_entry(name, data_chunk)
                 elif data_chunk.ident == "PATH":
-                    all_names.append(name_chunk.buffer.read_ascii_string(name_chunk.buffer.remaining()))
-                    all_names.extend(data_chunk.buffer.read_ascii_string(data_chunk.buffer.remaining()).split(";"))
+                    all_names.append(name)
+                    all_names.extend(data_chunk.buffer.read_cstring_table(1)[0].split(";"))
                 else:
                     assert False, f"Chunk of type {data_chunk.header.ident!r} not supported"
         if all_names:
             assert len(all_names) - 1 == len(self.files)
 
+    def _add_entry(self, name: str, chunk: LoopChunk):
+        entry = ResEntry(name, chunk)
+        self.files.append(entry)
+        self._index[normalize_res_name(name)] = entry
+
+    def to_summary(self) -> dict:
+        return {
+            "entries": [[entry.name, entry.chunk.ident, entry.chunk.offset, entry.size, entry.chunk.header.alignment]
+                        for entry in self.files]
+        }
+
+    @classmethod
+    def from_summary(cls, buffer: Buffer, summary: dict) -> 'ResArchive':
+        # Rebuilds a lazy archive from to_summary() output without scanning the container again.
+        archive = cls.__new__(cls)
+        archive.files = []
+        archive._index = {}
+        for name, ident, offset, size, alignment in summary["entries"]:
+            archive._add_entry(name, LoopChunk(FFLIHeader(ident, size, alignment, 0), offset, buffer))
+        return archive
+
     def __repr__(self):
         return f"ResArchive({len(self.files)} files)"
 
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_res_name(name) in self._index
+
+    def __getitem__(self, name: str) -> Buffer:
+        return self._index[normalize_res_name(name)].open()
+
+    def get(self, name: str, default: Optional[Buffer] = None) -> Optional[Buffer]:
+        entry = self._index.get(normalize_res_name(name))
+        if entry is None:
+            return default
+        return entry.open()
+
+    def get_entry(self, name: str) -> Optional[ResEntry]:
+        return self._index.get(normalize_res_name(name))
+
     def __iter__(self) -> Iterable[tuple[str, Buffer]]:
         for entry in self.files:
             name = entry.name
             if name.startswith("LOCAL:"):
                 name = name[6:]
             yield name, entry.data
+
+
+@dataclass(slots=True)
+class ExtractionStats:
+    files: int
+    bytes: int
+    seconds: float
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+
+def extract_archive(res_path: Union[str, Path], output_dir: Union[str, Path],
+                    max_workers: Optional[int] = None) -> ExtractionStats:
+    start = time.perf_counter()
+    output_dir = Path(output_dir).resolve()
+    with FileBuffer(res_path) as buffer:
+        archive = ResArchive(buffer, lazy=True)
+        # Later entries with the same name win, as they do for lookups.
+        jobs: dict[Path, ResEntry] = {}
+        for entry in archive.files:
+            target = (output_dir / res_entry_path(entry.name)).resolve()
+            if not target.is_relative_to(output_dir):
+                raise ValueError(f"Entry {entry.name!r} points outside of {output_dir}")
+            jobs[target] = entry
+        for directory in {target.parent for target in jobs}:
+            directory.mkdir(parents=True, exist_ok=True)
+
+        source_fd = buffer.fileno()
+        with ThreadPoolExecutor(max_workers) as pool:
+            list(pool.map(lambda job: _copy_range(source_fd, res_path, job[1].chunk.offset, job[1].size, job[0]),
+                          jobs.items()))
+    return ExtractionStats(len(jobs), sum(entry.size for entry in jobs.values()), time.perf_counter() - start)
+
+
+def _copy_range(source_fd: int, source_path: Path, offset: int, size: int, target: Path):
+    target_fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        copied = 0
+        # Let the kernel copy the range when it can, falling back to plain reads and writes otherwise.
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < size:
+                    count = os.copy_file_range(source_fd, target_fd, size - copied, offset + copied)
+                    if count == 0:
+                        break
+                    copied += count
+            except OSError:
+                pass
+        if copied < size and hasattr(os, "sendfile"):
+            try:
+                while copied < size:
+                    count = os.sendfile(target_fd, source_fd, offset + copied, size - copied)
+                    if count == 0:
+                        break
+                    copied += count
+            except OSError:
+                pass
+        if copied < size:
+            if hasattr(os, "pread"):
+                while copied < size:
+                    data = os.pread(source_fd, min(size - copied, 1 << 20), offset + copied)
+                    if not data:
+                        break
+                    copied += os.write(target_fd, data)
+            else:
+                # Without pread the workers can't share one file position, each gets its own handle.
+                with FileBuffer(source_path) as source:
+                    source.seek(offset + copied)
+                    while copied < size:
+                        data = source.read(min(size - copied, 1 << 20))
+                        if not data:
+                            break
+                        copied += os.write(target_fd, data)
+        if copied != size:
+            raise BufferError(f"Expected {size} bytes for {target}, copied {copied}")
+    finally:
+        os.close(target_fd)
+
+
+def _encode_name(name: str) -> bytes:
+    # Names are read back as latin-1, ';' separates the names of the PATH list.
+    if ";" in name or "\x00" in name:
+        raise ValueError(f"Entry name {name!r} contains ';' or NUL")
+    try:
+        return name.encode("latin-1") + b"\x00"
+    except UnicodeEncodeError:
+        raise ValueError(f"Entry name {name!r} can't be encoded as latin-1") from None
+
+
+@dataclass(slots=True)
+class PackStats:
+    entries: int = 0
+    skipped: int = 0
+    bytes_written: int = 0
+
+
+class ResPacker:
+    """Streams NAME/BODY chunk pairs into a new IRES container, overlaying inputs by name.
+
+    The first entry packed under a normalized name wins. A later entry with the same name and identical
+    content is skipped; one with different content is a conflict and raises ValueError. Only the name is
+    used for lookup: IRES has no way to point two names at one body, so every name stores its own copy.
+    """
+
+    def __init__(self, buffer: Buffer, path_list_name: Optional[str] = None):
+        self._writer = LoopFileWriter(buffer, "IRES")
+        self._digests: dict[str, bytes] = {}
+        self._names: list[str] = []
+        self.path_list_name = path_list_name
+        self.stats = PackStats()
+
+    def add(self, name: str, data) -> bool:
+        encoded_name = _encode_name(name)
+        if isinstance(data, Buffer):
+            data = data.data
+        if isinstance(data, np.ndarray):
+            data = np.ascontiguousarray(data).reshape(-1).view(np.uint8)
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        key = normalize_res_name(name)
+        packed_digest = self._digests.get(key)
+        if packed_digest is not None:
+            if packed_digest != digest:
+                raise ValueError(f"Entry {name!r} was already packed with different content")
+            self.stats.skipped += 1
+            return False
+        self._digests[key] = digest
+        self._names.append(name)
+        self._writer.write_chunk("NAME", encoded_name)
+        self._writer.write_chunk("BODY", data)
+        self.stats.entries += 1
+        self.stats.bytes_written += memoryview(data).nbytes
+        return True
+
+    def add_file(self, name: str, path: Union[str, Path]) -> bool:
+        with MappedBuffer(path) as buffer:
+            return self.add(name, buffer.data)
+
+    def add_directory(self, directory: Union[str, Path], prefix: str = "LOCAL:") -> int:
+        directory = Path(directory)
+        added = 0
+        for path in sorted(directory.rglob("*")):
+            if path.is_file():
+                added += self.add_file(prefix + path.relative_to(directory).as_posix(), path)
+        return added
+
+    def add_all(self, entries: Iterable[tuple[str, object]]) -> int:
+        return sum(self.add(name, data) for name, data in entries)
+
+    def close(self):
+        if self.path_list_name is not None:
+            self._writer.write_chunk("NAME", _encode_name(self.path_list_name))
+            self._writer.write_chunk("PATH", ";".join(self._names).encode("latin-1") + b"\x00")
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
@@ -0,0 +1,14 @@
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# The repository root is the igi2cs package itself, register it under that name when it is not installed.
+if "igi2cs" not in sys.modules:
+    try:
+        import igi2cs  # noqa: F401
+    except ImportError:
+        package = types.ModuleType("igi2cs")
+        package.__path__ = [str(ROOT)]
+        sys.modules["igi2cs"] = package
@@ -0,0 +1,83 @@
+"""Builders for small synthetic RES and MTP files."""
+import struct
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+
+from igi2cs.file_utils import FileBuffer, WritableMemoryBuffer
+from igi2cs.loop_file import LoopFileWriter
+
+
+def res_bytes(entries: Iterable[tuple[str, bytes]]) -> bytes:
+    buffer = WritableMemoryBuffer()
+    with LoopFileWriter(buffer, "IRES") as writer:
+        for name, data in entries:
+            writer.write_chunk("NAME", name.encode("latin-1") + b"\x00")
+            writer.write_chunk("BODY", data)
+    return bytes(buffer.data)
+
+
+def write_res(path: Union[str, Path], entries: Iterable[tuple[str, bytes]]):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with FileBuffer(path, "wb") as f, LoopFileWriter(f, "IRES") as writer:
+        for name, data in entries:
+            writer.write_chunk("NAME", name.encode("latin-1") + b"\x00")
+            writer.write_chunk("BODY", data)
+
+
+def _form_chunk(ident: bytes, payload: bytes) -> bytes:
+    return ident + struct.pack(">I", len(payload)) + payload + b"\x00" * (-len(payload) % 4)
+
+
+def name_table(names: list[str]) -> bytes:
+    return struct.pack("<I", len(names)) + b"".join(name.encode("latin-1") + b"\x00" for name in names)
+
+
+def inst_payload(instances: list[tuple[int, list[int]]]) -> bytes:
+    return b"".join(struct.pack(f"<2I{len(ids)}I", model_id, len(ids), *ids) for model_id, ids in instances)
+
+
+def gtt_payload(indices: list[int]) -> bytes:
+    return struct.pack("<I", len(indices)) + b"".join(struct.pack("<Ii", index, 0) for index in indices)
+
+
+def mtp_from_chunks(chunks: Iterable[tuple[bytes, bytes]]) -> bytes:
+    """MTP made of the given (chunk name, payload) pairs, in order."""
+    body = b"MTP " + b"".join(_form_chunk(name, payload) for name, payload in chunks)
+    return b"FORM" + struct.pack(">I", len(body)) + body
+
+
+def mtp_bytes(models: dict[str, list[str]]) -> bytes:
+    """MTP with one instance per model, using the listed textures in order."""
+    textures = list(dict.fromkeys(texture for names in models.values() for texture in names))
+    instances = [(model_id, [textures.index(name) for name in names]) for model_id, names in enumerate(models.values())]
+    return mtp_from_chunks([(b"BANM", name_table([])), (b"SNDS", name_table([])), (b"SVOL", name_table([])),
+                            (b"MODS", name_table(list(models))), (b"VNAM", struct.pack("<I", 0)),
+                            (b"INST", inst_payload(instances)), (b"TEXF", name_table(textures)),
+                            (b"PALF", b"\x00" * 4), (b"GTT ", gtt_payload(list(range(len(textures)))))])
+
+
+def write_mtp(path: Union[str, Path], models: dict[str, list[str]]):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(mtp_bytes(models))
+
+
+def mef_bytes(morph_vertices: int = 1000) -> bytes:
+    """MEF with a mostly zeroed MESH chunk and a MRPH chunk holding `morph_vertices` vertices in every channel."""
+    from igi2cs.mef import ModelInfo, MorphVertexDtype
+
+    morphs = np.zeros(morph_vertices, MorphVertexDtype)
+    morphs["index"][:, 0] = np.arange(morph_vertices)
+    buffer = WritableMemoryBuffer()
+    with LoopFileWriter(buffer, "OCEM", flip_ident=True) as writer:
+        model_info = np.zeros(1, ModelInfo.schema.dtype)
+        model_info["creation_time"] = (2000, 1, 1, 0, 0, 0, 0)
+        writer.write_chunk("MESH", model_info)
+        with writer.chunk("MRPH") as chunk:
+            chunk.write_array(np.full(16, morph_vertices, np.uint32))
+            for _ in range(16):
+                chunk.write_array(morphs)
+    return bytes(buffer.data)
@@ -0,0 +1,18 @@
+from igi2cs.asset_cache import AssetCache
+
+
+def test_invalidate_archive(tmp_path):
+    cache = AssetCache(content_manager=None, max_bytes=1 << 20)
+    res_path = tmp_path / "a.res"
+    cache.put((res_path, "x.tex", "tex"), b"1")
+    cache.put((tmp_path / "b.res", "x.tex", "tex"), b"2")
+    cache.put("abc", b"3")
+    cache.put(42, b"4")
+    # Strings used to be matched by their first character, other keys used to raise TypeError.
+    cache.invalidate("a")
+    assert len(cache) == 4
+    cache.invalidate(res_path)
+    assert (res_path, "x.tex", "tex") not in cache
+    assert len(cache) == 3
+    cache.invalidate()
+    assert len(cache) == 0 and cache.stats.bytes_used == 0
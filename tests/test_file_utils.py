@@ -0,0 +1,46 @@
+import io
+import struct
+
+import numpy as np
+import pytest
+
+from igi2cs.file_utils import MemoryBuffer, WritableMemoryBuffer
+from igi2cs.mtp import MTPIndex
+
+
+@pytest.mark.parametrize("buffer_class", [io.BytesIO, WritableMemoryBuffer])
+def test_truncate_matches_bytes_io(buffer_class):
+    buffer = buffer_class(b"hello world")
+    assert buffer.truncate(100) == 100
+    assert buffer.getvalue() == b"hello world"
+    buffer.seek(5)
+    assert buffer.truncate() == 5
+    assert buffer.tell() == 5
+    assert buffer.getvalue() == b"hello"
+    # Writing past the end after a truncate leaves a zero gap.
+    buffer.seek(7)
+    buffer.write(b"!")
+    assert buffer.getvalue() == b"hello\x00\x00!"
+    with pytest.raises(ValueError):
+        buffer.truncate(-1)
+
+
+def test_growth_keeps_exported_views():
+    buffer = WritableMemoryBuffer()
+    buffer.write_array([1, 2], np.uint32)
+    buffer.seek(0)
+    values = buffer.read_array(np.uint32, 1)
+    data = buffer.data
+    buffer.seek(0, io.SEEK_END)
+    buffer.write(b"x" * 64)
+    assert values.tolist() == [1]
+    assert data.tobytes() == np.array([1, 2], "<u4").tobytes()
+    assert buffer.getvalue() == data.tobytes() + b"x" * 64
+
+
+def test_structure_array_indexing():
+    records = MemoryBuffer(struct.pack("<6I", 0, 1, 2, 3, 4, 5)).read_structure_array(0, 3, MTPIndex)
+    assert [records[i].index for i in (0, -1, -3)] == [0, 4, 0]
+    for index in (3, -4, -5):
+        with pytest.raises(IndexError):
+            records[index]
@@ -0,0 +1,128 @@
+import shutil
+
+import pytest
+
+from igi2cs.content_manager import ContentManager
+from igi2cs.file_watcher import InotifyWatcher, PollingWatcher, create_watcher
+
+from synthetic import write_mtp, write_res
+
+SUFFIXES = (".mtp", ".res")
+
+WATCHERS = [
+    pytest.param(PollingWatcher, id="polling"),
+    pytest.param(InotifyWatcher, id="inotify",
+                 marks=pytest.mark.skipif(not InotifyWatcher.available(), reason="inotify is not available")),
+]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for level in range(3):
+        write_mtp(tmp_path / f"level{level}" / "objects" / "level.mtp", {f"model{level}": ["bark"]})
+        write_res(tmp_path / f"level{level}" / "pack.res", [("LOCAL:a.txt", b"a" * level)])
+    return tmp_path
+
+
+@pytest.mark.parametrize("watcher_class", WATCHERS)
+def test_add_modify_delete(tree, watcher_class):
+    with watcher_class(tree, SUFFIXES) as watcher:
+        assert len(watcher.scan()) == 6
+        assert not watcher.changes()
+
+        write_res(tree / "level0" / "extra.res", [("a", b"1")])
+        write_res(tree / "level1" / "pack.res", [("LOCAL:a.txt", b"longer")])
+        (tree / "level2" / "pack.res").unlink()
+        (tree / "level2" / "notes.txt").write_text("ignored")
+        changes = watcher.changes()
+        assert changes.added == [tree / "level0" / "extra.res"]
+        assert changes.modified == [tree / "level1" / "pack.res"]
+        assert changes.removed == [tree / "level2" / "pack.res"]
+        assert not watcher.changes()
+        assert len(watcher.files) == 6
+
+
+@pytest.mark.parametrize("watcher_class", WATCHERS)
+def test_directories(tree, watcher_class):
+    with watcher_class(tree, SUFFIXES) as watcher:
+        watcher.scan()
+        write_mtp(tree / "level3" / "objects" / "level.mtp", {"model": []})
+        shutil.rmtree(tree / "level0")
+        changes = watcher.changes()
+        assert changes.added == [tree / "level3" / "objects" / "level.mtp"]
+        assert changes.removed == [tree / "level0" / "pack.res", tree / "level0" / "objects" / "level.mtp"]
+
+        (tree / "level1").rename(tree / "moved")
+        changes = watcher.changes()
+        assert sorted(changes.added) == [tree / "moved" / "objects" / "level.mtp", tree / "moved" / "pack.res"]
+        assert sorted(changes.removed) == [tree / "level1" / "objects" / "level.mtp", tree / "level1" / "pack.res"]
+
+
+@pytest.mark.parametrize("watcher_class", WATCHERS)
+def test_invalidate(tree, watcher_class):
+    with watcher_class(tree, SUFFIXES) as watcher:
+        watcher.scan()
+        path = tree / "level1" / "pack.res"
+        watcher.invalidate([path])
+        assert watcher.changes().added == [path]
+        assert not watcher.changes()
+
+
+@pytest.mark.parametrize("watcher_class", WATCHERS)
+def test_seeded_files(tree, watcher_class):
+    with PollingWatcher(tree, SUFFIXES) as scanner:
+        scanner.scan()
+    (tree / "level0" / "pack.res").unlink()
+    with watcher_class(tree, SUFFIXES, files=scanner.files) as watcher:
+        assert watcher.poll().removed == [tree / "level0" / "pack.res"]
+        assert not watcher.changes()
+
+
+def test_create_watcher_fallback(tree):
+    with create_watcher(tree, SUFFIXES, use_inotify=False) as watcher:
+        assert type(watcher) is PollingWatcher
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_content_manager_refresh(tree, use_inotify):
+    content_manager = ContentManager(tree, use_inotify=use_inotify)
+    try:
+        # The watcher that refresh uses is only created by the first refresh.
+        assert type(content_manager._watcher) is PollingWatcher
+        records = content_manager.res_records
+        assert not content_manager.refresh()
+
+        write_res(tree / "level1" / "pack.res", [("LOCAL:a.txt", b"1"), ("LOCAL:b.txt", b"2")])
+        (tree / "level2" / "pack.res").unlink()
+        write_mtp(tree / "level3" / "objects" / "level.mtp", {"model3": ["leaf"]})
+        changes = content_manager.refresh()
+        assert changes.added == [tree / "level3" / "objects" / "level.mtp"]
+        assert changes.modified == [tree / "level1" / "pack.res"]
+        assert changes.removed == [tree / "level2" / "pack.res"]
+        assert [len(record.res) for record in content_manager.res_records] == [1, 2]
+        assert content_manager.find_texture_users("leaf")[0].model_name == "model3"
+        # Lists obtained before the refresh are not changed.
+        assert len(records) == 3
+    finally:
+        content_manager.close()
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_content_manager_failed_refresh(tree, use_inotify):
+    content_manager = ContentManager(tree, use_inotify=use_inotify)
+    try:
+        content_manager.refresh()
+        (tree / "level1" / "pack.res").write_bytes(b"junk")
+        (tree / "level2" / "pack.res").unlink()
+        with pytest.raises(Exception):
+            content_manager.refresh()
+        # The removal is applied even though the refresh failed, the broken file keeps its old record.
+        assert [record.path for record in content_manager.res_records] == [tree / "level0" / "pack.res",
+                                                                             tree / "level1" / "pack.res"]
+
+        write_res(tree / "level1" / "pack.res", [("LOCAL:a.txt", b"1"), ("LOCAL:b.txt", b"2")])
+        changes = content_manager.refresh()
+        assert changes.added == [tree / "level1" / "pack.res"] and not changes.removed
+        assert [len(record.res) for record in content_manager.res_records] == [1, 2]
+    finally:
+        content_manager.close()
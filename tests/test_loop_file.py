@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from igi2cs.file_utils import FileBuffer, MemoryBuffer, WritableMemoryBuffer
+from igi2cs.io_profiler import BufferProfiler
+from igi2cs.loop_file import LoopFile, LoopFileWriter
+
+from synthetic import write_res
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_lazy_reads_headers_only(tmp_path, lazy):
+    entries = [(f"LOCAL:file{i}.bin", bytes([i]) * (1000 + i)) for i in range(50)]
+    write_res(tmp_path / "archive.res", entries)
+    payload = sum(len(name) + 1 + len(data) for name, data in entries)
+    with FileBuffer(tmp_path / "archive.res") as buffer, BufferProfiler() as profiler:
+        loop_file = LoopFile(buffer, lazy=lazy)
+        bytes_read = profiler.total.bytes_read
+        assert len(loop_file.chunk_stack) == 100
+        # Root header and container type, then one 16 byte header per chunk.
+        headers = 16 + 4 + 16 * 100
+        assert bytes_read == (headers if lazy else headers + payload)
+        assert loop_file.chunk_stack[1].buffer.read() == entries[0][1]
+
+
+@pytest.mark.parametrize("flip_ident", [False, True])
+@pytest.mark.parametrize("lazy", [False, True])
+def test_writer_round_trip(flip_ident, lazy):
+    chunks = [("NAME", b"LOCAL:a.bin\x00", 4), ("BODY", b"\x01" * 13, 16), ("EMPT", b"", 4),
+              ("ARRY", np.arange(7, dtype=np.uint16), 32), ("ODD1", b"xyz", 1)]
+    buffer = WritableMemoryBuffer()
+    with LoopFileWriter(buffer, "TEST", flip_ident=flip_ident) as writer:
+        for ident, data, alignment in chunks[:3]:
+            writer.write_chunk(ident, data, alignment)
+        with writer.chunk("STRM", alignment=8) as stream:
+            stream.write(b"streamed ")
+            stream.write_uint32(0xDEADBEEF)
+        for ident, data, alignment in chunks[3:]:
+            writer.write_chunk(ident, data, alignment)
+    chunks.insert(3, ("STRM", b"streamed " + (0xDEADBEEF).to_bytes(4, "little"), 8))
+
+    data = buffer.getvalue()
+    loop_file = LoopFile(MemoryBuffer(data), flip_ident=flip_ident, lazy=lazy)
+    assert loop_file.root_header.data_size == len(data)
+    assert loop_file.is_container_for("TEST")
+    read_chunks = loop_file.chunk_stack
+    assert [chunk.ident for chunk in read_chunks] == [ident for ident, _, _ in chunks]
+    for chunk, (_, payload, alignment) in zip(read_chunks, chunks):
+        assert chunk.buffer.read() == memoryview(payload).cast("B").tobytes()
+        assert chunk.header.alignment == alignment
+    for chunk, next_chunk in zip(read_chunks, read_chunks[1:]):
+        # next_offset leads from one header to the next, which starts at the previous chunk's alignment.
+        assert chunk.offset + chunk.header.next_offset == next_chunk.offset
+        assert (next_chunk.offset - 16) % chunk.header.alignment == 0
+    assert read_chunks[-1].header.next_offset == 0
+    # Chunk identifiers are stored reversed in flipped files.
+    assert (b"EMAN" in data) == flip_ident
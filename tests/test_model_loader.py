@@ -0,0 +1,30 @@
+from igi2cs.content_manager import ContentManager
+from igi2cs.model_loader import ModelLoader
+from igi2cs.vfs import VirtualFileSystem
+
+from synthetic import write_mtp, write_res
+
+
+def test_dependencies(tmp_path):
+    write_mtp(tmp_path / "level" / "objects" / "level.mtp", {"Tree01": ["Bark", "leaf"], "rock": []})
+    write_res(tmp_path / "level" / "models.res", [("LOCAL:objects\\Tree01.mef", b""),
+                                                  ("LOCAL:objects\\missing.mef", b"")])
+    write_res(tmp_path / "level" / "textures.res", [("LOCAL:textures\\bark.tex", b"")])
+    (tmp_path / "outside.mef").write_bytes(b"")
+    content_manager = ContentManager(tmp_path)
+    try:
+        with ModelLoader(VirtualFileSystem(content_manager)) as loader:
+            # MTP model names are case-sensitive, the entry name keeps its case for the lookup.
+            dependencies = loader.dependencies("level/objects/tree01.mef")
+            assert dependencies.texture_names == ["Bark", "leaf"]
+            assert dependencies.textures["Bark"].path == "level/textures/bark.tex"
+            assert dependencies.textures["leaf"] is None
+            assert dependencies.lookup_error is None
+
+            dependencies = loader.dependencies("level/objects/missing.mef")
+            assert dependencies.texture_names == []
+            assert isinstance(dependencies.lookup_error, ValueError)
+
+            assert isinstance(loader.dependencies("outside.mef").lookup_error, LookupError)
+    finally:
+        content_manager.close()
@@ -0,0 +1,64 @@
+import struct
+
+import pytest
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mtp import MTPFile, TEXTURE_SECTIONS
+
+from synthetic import gtt_payload, inst_payload, mtp_bytes, mtp_from_chunks, name_table
+
+
+def test_texture_names():
+    mtp = MTPFile(MemoryBuffer(mtp_bytes({"Tree01": ["bark", "leaf"], "rock": []})))
+    assert mtp.models == ["Tree01", "rock"]
+    assert mtp.get_texture_names("Tree01") == ["bark", "leaf"]
+    assert mtp.get_texture_names("rock") == []
+    with pytest.raises(ValueError):
+        mtp.get_texture_names("tree01")
+
+
+@pytest.mark.parametrize("sections", [None, TEXTURE_SECTIONS, ()])
+def test_multiple_gtt_chunks(sections):
+    data = mtp_from_chunks([(b"MODS", name_table(["a"])), (b"TEXF", name_table(["t0", "t1", "t2"])),
+                            (b"GTT ", gtt_payload([2])), (b"GTT ", gtt_payload([])), (b"GTT ", gtt_payload([0, 1]))])
+    mtp = MTPFile(MemoryBuffer(data), sections=sections)
+    assert [texture_info.index for texture_info in mtp.texture_infos] == [2, 0, 1]
+    assert mtp.texture_info_array["index"].tolist() == [2, 0, 1]
+
+
+@pytest.mark.parametrize("sections", [None, TEXTURE_SECTIONS, ()])
+def test_multiple_inst_chunks(sections):
+    data = mtp_from_chunks([(b"MODS", name_table(["a", "b", "c"])), (b"TEXF", name_table(["t0", "t1"])),
+                            (b"INST", inst_payload([(0, [0])])), (b"GTT ", gtt_payload([0])),
+                            (b"INST", inst_payload([(1, [1]), (0, [])])), (b"GTT ", gtt_payload([1]))])
+    mtp = MTPFile(MemoryBuffer(data), sections=sections)
+    assert [(instance.model_id, instance.texture_info_ids) for instance in mtp.instances] == [(0, [0]), (1, [1]),
+                                                                                                (0, [])]
+    assert mtp.instances.offsets.tolist() == [0, 1, 2, 2]
+    assert mtp.get_texture_names("a") == ["t0"]
+    assert mtp.get_texture_names("b") == ["t1"]
+    assert mtp.get_texture_names("c") == []
+    assert MTPFile.from_summary(mtp.to_summary()).get_texture_names("b") == ["t1"]
+
+
+def test_instance_indexing():
+    mtp = MTPFile(MemoryBuffer(mtp_bytes({"a": ["t0"], "b": [], "c": ["t0"]})))
+    assert [mtp.instances[i].model_id for i in (0, -1, -3)] == [0, 2, 0]
+    for index in (3, -4, -5):
+        with pytest.raises(IndexError):
+            mtp.instances[index]
+
+
+@pytest.mark.parametrize("payload", [struct.pack("<3I", 0, 0, 5), struct.pack("<3I", 0, 2, 1)])
+def test_truncated_instances(payload):
+    with pytest.raises(BufferError):
+        MTPFile(MemoryBuffer(mtp_from_chunks([(b"INST", payload)])))
+
+
+def test_texture_info_id_out_of_range():
+    data = mtp_from_chunks([(b"MODS", name_table(["a", "b"])), (b"TEXF", name_table(["t0"])),
+                            (b"INST", inst_payload([(0, [0]), (1, [0, 7])])), (b"GTT ", gtt_payload([0]))])
+    mtp = MTPFile(MemoryBuffer(data))
+    assert mtp.get_texture_names("a") == ["t0"]
+    with pytest.raises(IndexError):
+        mtp.get_texture_names("b")
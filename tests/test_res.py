@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from igi2cs.file_utils import FileBuffer, MemoryBuffer, WritableMemoryBuffer
+from igi2cs.res import ResArchive, ResPacker, extract_archive, res_entry_path
+
+from synthetic import res_bytes, write_res
+
+ENTRIES = [(f"LOCAL:dir\\file{i}.bin", bytes([i % 251]) * (i % 97 + 1)) for i in range(2000)]
+
+
+def test_lookups_have_their_own_position():
+    archive = ResArchive(MemoryBuffer(res_bytes(ENTRIES)))
+    assert archive["dir/file5.bin"].read() == ENTRIES[5][1]
+    assert archive["DIR/FILE5.BIN"].read() == ENTRIES[5][1]
+    assert archive.get("dir/file5.bin").read() == ENTRIES[5][1]
+
+
+@pytest.mark.parametrize("source", ["memory", "file", "writable"])
+def test_concurrent_lazy_reads(tmp_path, source):
+    if source == "memory":
+        buffer = MemoryBuffer(res_bytes(ENTRIES))
+    elif source == "file":
+        write_res(tmp_path / "archive.res", ENTRIES)
+        buffer = FileBuffer(tmp_path / "archive.res")
+    else:
+        buffer = WritableMemoryBuffer(res_bytes(ENTRIES))
+    with buffer:
+        archive = ResArchive(buffer, lazy=True)
+        position = buffer.tell()
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda entry: archive[entry[0]].read() == entry[1], ENTRIES * 3))
+        assert buffer.tell() == position
+    assert all(results)
+
+
+def test_packer_names():
+    buffer = WritableMemoryBuffer()
+    with ResPacker(buffer, path_list_name="paths") as packer:
+        packer.add("LOCAL:textures\\caf\xe9.tex", b"1")
+        for name in ("a;b.tex", "ж.tex", "a\x00b"):
+            with pytest.raises(ValueError):
+                packer.add(name, b"2")
+        packer.add("LOCAL:b.tex", b"3")
+    archive = ResArchive(MemoryBuffer(buffer.getvalue()))
+    assert [entry.name for entry in archive.files] == ["LOCAL:textures\\caf\xe9.tex", "LOCAL:b.tex"]
+    assert archive["textures/CAF\xc9.tex"].read() == b"1"
+
+
+
+def test_packer_overlay():
+    buffer = WritableMemoryBuffer()
+    with ResPacker(buffer) as packer:
+        assert packer.add("LOCAL:a.tex", b"1")
+        assert not packer.add("LOCAL:A.TEX", b"1")
+        with pytest.raises(ValueError):
+            packer.add("LOCAL:a.tex", b"2")
+        assert packer.add("LOCAL:b.tex", b"1")
+    assert (packer.stats.entries, packer.stats.skipped) == (2, 1)
+    archive = ResArchive(MemoryBuffer(buffer.getvalue()))
+    assert [entry.name for entry in archive.files] == ["LOCAL:a.tex", "LOCAL:b.tex"]
+    assert archive["a.tex"].read() == archive["b.tex"].read() == b"1"
+
+@pytest.mark.parametrize("copy_path", ["kernel", "pread", "read"])
+def test_extract_archive(tmp_path, monkeypatch, copy_path):
+    entries = [(f"LOCAL:dir{i % 7}\\file{i}.bin", bytes([i % 251]) * (i * 37 % 5000)) for i in range(3000)]
+    write_res(tmp_path / "archive.res", entries)
+    calls = []
+    if copy_path == "kernel":
+        if not hasattr(os, "copy_file_range") and not hasattr(os, "sendfile"):
+            pytest.skip("no kernel range copy on this platform")
+        for name in ("copy_file_range", "sendfile"):
+            if hasattr(os, name):
+                function = getattr(os, name)
+                monkeypatch.setattr(os, name, lambda *args, _function=function: calls.append(1) or _function(*args))
+    else:
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+        monkeypatch.delattr(os, "sendfile", raising=False)
+        if copy_path == "read":
+            monkeypatch.delattr(os, "pread", raising=False)
+
+    stats = extract_archive(tmp_path / "archive.res", tmp_path / "out")
+    assert stats.files == len(entries)
+    assert stats.bytes == sum(len(data) for _, data in entries)
+    for name, data in entries:
+        assert (tmp_path / "out" / res_entry_path(name)).read_bytes() == data
+    assert bool(calls) == (copy_path == "kernel")
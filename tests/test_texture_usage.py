@@ -0,0 +1,20 @@
+from pathlib import Path
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mtp import MTPFile
+from igi2cs.texture_usage import TextureUsage, TextureUsageIndex
+
+from synthetic import gtt_payload, inst_payload, mtp_from_chunks, name_table
+
+
+def test_usages():
+    data = mtp_from_chunks([(b"MODS", name_table(["a", "b"])), (b"TEXF", name_table(["T0", "t1"])),
+                            # Texture info id 9 is past the GTT table and only that usage is dropped.
+                            (b"INST", inst_payload([(0, [0, 1]), (1, [1, 9]), (0, [0, 1])])),
+                            (b"GTT ", gtt_payload([0, 1]))])
+    path = Path("level.mtp")
+    index = TextureUsageIndex([(path, MTPFile(MemoryBuffer(data)))])
+    assert index.texture_names() == ["t0", "t1"]
+    assert index.find("t0") == [TextureUsage(path, "a", 0)]
+    assert index.find("T1") == [TextureUsage(path, "a", 1), TextureUsage(path, "b", 0)]
+    assert index.count("t1") == 2 and "t2" not in index
@@ -0,0 +1,31 @@
+import tracemalloc
+
+from igi2cs.file_utils import MemoryBuffer
+from igi2cs.mef import MefModel
+from igi2cs.res import ResArchive
+
+from synthetic import mef_bytes, res_bytes
+
+
+def _traced_peak(parse, data: bytes) -> int:
+    tracemalloc.start()
+    try:
+        result = parse(MemoryBuffer(data))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def test_res_payloads_are_not_copied():
+    data = res_bytes((f"LOCAL:file{i}.bin", bytes([i]) * 65536) for i in range(200))
+    # Only the chunk index is allocated (about 0.3 MiB here), copying the bodies would take all 12.5 MiB.
+    assert _traced_peak(ResArchive, data) < len(data) // 10
+
+
+def test_mef_arrays_are_views():
+    data = mef_bytes(50000)
+    model = MefModel(MemoryBuffer(data))
+    assert all(not channel.flags.owndata for channel in model.morph_channels.values())
+    assert _traced_peak(MefModel, data) < len(data) // 10
@@ -1,10 +1,13 @@
 from dataclasses import dataclass
 from enum import IntEnum
+from typing import ClassVar
 
 import numpy as np
 from numpy.distutils.conv_template import header
 
-from igi2cs.file_utils import Buffer
+from igi2cs.file_utils import Buffer, decode_ascii_string
+from igi2cs.io_profiler import io_profiled
+from igi2cs.record_schema import RecordSchema
 from igi2cs.texture_decoder import Texture, PixelFormat
 
 
@@ -34,25 +37,18 @@ class TexHeader:
     cropped_height: int
     bytes_per_pixel: int
 
+    schema: ClassVar[RecordSchema] = RecordSchema(
+        ("ident", "4s"), ("version", "I"), ("mode", "I"), ("flags", "I"), ("palette_offset", "I"),
+        ("scale_factor", "H"), ("width", "H"), ("height", "H"), ("cropped_width", "H"), ("cropped_height", "H"),
+        ("bytes_per_pixel", "H"),
+    )
+
     @classmethod
     def from_buffer(cls, buffer: Buffer):
-        ident = buffer.read_ascii_string(4)
-        version = buffer.read_uint32()
-        mode = buffer.read_uint32()
+        ident, version, mode, flags, palette_offset, *dimensions = cls.schema.read(buffer)
         conv_mode = ConversionMode(mode & 0x3F)
         has_mips = (mode & 0x40) != 0
-        flags = buffer.read_uint32()
-        palette_offset = buffer.read_uint32()
-
-        scale_factor = buffer.read_uint16()
-        width = buffer.read_uint16()
-        height = buffer.read_uint16()
-        cropped_width = buffer.read_uint16()
-        cropped_height = buffer.read_uint16()
-        bytes_per_pixel = buffer.read_uint16()
-        return cls(ident, version, conv_mode, has_mips, flags, palette_offset, scale_factor, width, height,
-                   cropped_width,
-                   cropped_height, bytes_per_pixel)
+        return cls(decode_ascii_string(ident), version, conv_mode, has_mips, flags, palette_offset, *dimensions)
 
 
 def argb1555_to_rgba5551(argb_pixels: np.ndarray) -> np.ndarray:
@@ -69,36 +65,71 @@ class UnsupportedImageMode(Exception):
     pass
 
 class TexTexture:
+    @io_profiled
     def __init__(self, buffer: Buffer):
         self.header = TexHeader.from_buffer(buffer)
         if self.header.conversion_mode == ConversionMode.Palette4:
             raise UnsupportedImageMode("Palette 4 is not supported")
+        if self.header.palette_offset != 0:
+            raise Exception("Palette offset is not supported")
 
+        bytes_per_pixel = self.header.bytes_per_pixel
         width = self.header.cropped_width
         height = self.header.cropped_height
-
-        self.image_data = buffer.read(width * height * self.header.bytes_per_pixel)
-        if self.header.has_mips and self.header.conversion_mode == ConversionMode.ARGB8888:
+        # (offset, width, height) of every mip level, relative to the start of the pixel data.
+        self.mip_levels: list[tuple[int, int, int]] = [(0, width, height)]
+        size = width * height * bytes_per_pixel
+        if self.header.has_mips:
+            available = buffer.size() - buffer.tell()
             mip_width = width >> 1
             mip_height = height >> 1
             while mip_width >= 1 and mip_height >= 1:
-                buffer.skip(mip_width * mip_height * self.header.bytes_per_pixel)
+                mip_size = mip_width * mip_height * bytes_per_pixel
+                if size + mip_size > available:
+                    break
+                self.mip_levels.append((size, mip_width, mip_height))
+                size += mip_size
                 mip_width >>= 1
                 mip_height >>= 1
-        if self.header.palette_offset != 0:
-            raise Exception("Palette offset is not supported")
-
-        assert buffer.tell() == buffer.size()
-
-    def convert_to_rgba(self) -> bytes:
+        # All levels are read at once, mip() hands out views into this without copying.
+        self._pixel_data = buffer.read_view(size)
+        if len(self._pixel_data) < width * height * bytes_per_pixel:
+            raise BufferError(f"Expected {width * height * bytes_per_pixel} bytes of pixel data, "
+                              f"got {len(self._pixel_data)}")
+
+    @property
+    def mip_count(self) -> int:
+        return len(self.mip_levels)
+
+    def mip_size(self, level: int) -> tuple[int, int]:
+        _, width, height = self.mip_levels[level]
+        return width, height
+
+    def mip(self, level: int) -> memoryview:
+        """Raw pixels of a mip level (0 is the full size image), as a view into the texture data."""
+        offset, width, height = self.mip_levels[level]
+        return self._pixel_data[offset:offset + width * height * self.header.bytes_per_pixel]
+
+    def level_for_size(self, size: int) -> int:
+        """Returns the smallest mip level that is still at least `size` pixels on its longer side."""
+        for level in range(self.mip_count - 1, 0, -1):
+            _, width, height = self.mip_levels[level]
+            if max(width, height) >= size:
+                return level
+        return 0
+
+    @property
+    def image_data(self) -> memoryview:
+        return self.mip(0)
+
+    def convert_to_rgba(self, level: int = 0) -> bytes:
+        width, height = self.mip_size(level)
         if self.header.conversion_mode == ConversionMode.ARGB8888:
-            return Texture.from_data(self.image_data, self.header.cropped_width, self.header.cropped_height,
-                                     PixelFormat.BGRA8888).data
+            # ctypes only takes bytes for char pointers.
+            return Texture.from_data(bytes(self.mip(level)), width, height, PixelFormat.BGRA8888).data
         elif self.header.conversion_mode == ConversionMode.ARGB1555:
-            image_data = self.image_data
-            image_data = argb1555_to_rgba5551(np.frombuffer(image_data, np.uint16))
-            return Texture.from_data(image_data.tobytes(), self.header.cropped_width, self.header.cropped_height,
-                                     PixelFormat.RGBA5551).data
+            image_data = argb1555_to_rgba5551(np.frombuffer(self.mip(level), np.uint16))
+            return Texture.from_data(image_data.tobytes(), width, height, PixelFormat.RGBA5551).data
 
         else:
             raise Exception("Unsupported pixel format")
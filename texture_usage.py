@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from igi2cs.mtp import MTPFile
+
+
+@dataclass(slots=True, frozen=True)
+class TextureUsage:
+    mtp_path: Path
+    model_name: str
+    # Position in the model's texture list, the value face groups store in their *_texture fields.
+    slot: int
+
+
+class TextureUsageIndex:
+    """Reverse index from texture name (case-insensitive) to the models whose MTP instances use it.
+
+    Every instance of a model is taken into account, usages are reported once per model and slot.
+    Matches are kept as ranges of per-MTP arrays and only turned into TextureUsage objects by `find`.
+    """
+
+    def __init__(self, mtp_files: Iterable[tuple[Path, MTPFile]]):
+        self._mtps: list[tuple[Path, MTPFile]] = []
+        self._model_ids: list[np.ndarray] = []
+        self._slots: list[np.ndarray] = []
+        # Texture name -> (MTP number, start, stop) ranges into the arrays above.
+        self._ranges: dict[str, list[tuple[int, int, int]]] = {}
+        for path, mtp in mtp_files:
+            self._add(path, mtp)
+
+    def _add(self, path: Path, mtp: MTPFile):
+        instances = mtp.instances
+        counts = np.diff(instances.offsets)
+        if not len(instances.texture_info_ids):
+            return
+        slots = np.arange(len(instances.texture_info_ids)) - np.repeat(instances.offsets[:-1], counts)
+        model_ids = np.repeat(instances.model_ids.astype(np.int64), counts)
+        # Ids past the GTT table are dropped before indexing it, like models and textures out of range below.
+        gtt_indices = mtp.texture_info_array["index"].astype(np.int64)
+        texture_info_ids = instances.texture_info_ids
+        valid = texture_info_ids < len(gtt_indices)
+        texture_indices = gtt_indices[texture_info_ids[valid]]
+        model_ids, slots = model_ids[valid], slots[valid]
+        valid = (model_ids < len(mtp.models)) & (texture_indices < len(mtp.textures))
+        texture_indices, model_ids, slots = texture_indices[valid], model_ids[valid], slots[valid]
+        # One key per distinct (texture, model, slot), sorting the keys groups each texture into one range.
+        slot_count = int(slots.max()) + 1 if len(slots) else 1
+        model_count = len(mtp.models)
+        keys = np.unique((texture_indices * model_count + model_ids) * slot_count + slots)
+        texture_indices, rest = np.divmod(keys, model_count * slot_count)
+        model_ids, slots = np.divmod(rest, slot_count)
+        textures, starts = np.unique(texture_indices, return_index=True)
+        stops = np.append(starts[1:], len(keys))
+
+        number = len(self._mtps)
+        self._mtps.append((path, mtp))
+        self._model_ids.append(model_ids)
+        self._slots.append(slots)
+        for texture_index, start, stop in zip(textures.tolist(), starts.tolist(), stops.tolist()):
+            self._ranges.setdefault(mtp.textures[texture_index].lower(), []).append((number, start, stop))
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __contains__(self, texture_name: str) -> bool:
+        return texture_name.lower() in self._ranges
+
+    def texture_names(self) -> list[str]:
+        return sorted(self._ranges)
+
+    def find(self, texture_name: str) -> list[TextureUsage]:
+        usages = []
+        for number, start, stop in self._ranges.get(texture_name.lower(), ()):
+            path, mtp = self._mtps[number]
+            models = mtp.models
+            for model_id, slot in zip(self._model_ids[number][start:stop].tolist(),
+                                      self._slots[number][start:stop].tolist()):
+                usages.append(TextureUsage(path, models[model_id], slot))
+        return usages
+
+    def count(self, texture_name: str) -> int:
+        return sum(stop - start for _, start, stop in self._ranges.get(texture_name.lower(), ()))
@@ -0,0 +1,142 @@
+import fnmatch
+import os
+import posixpath
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from igi2cs.content_manager import ContentManager
+from igi2cs.file_utils import Buffer, MappedBuffer
+from igi2cs.res import ResArchive, ResEntry, normalize_res_name
+
+
+def normalize_path(path: Union[str, Path]) -> str:
+    path = str(path).replace("\\", "/").lower()
+    path = posixpath.normpath(path).lstrip("/")
+    return "" if path == "." else path
+
+
+@dataclass(slots=True)
+class VfsEntry:
+    path: str
+    source: Path
+    res_entry: Optional[ResEntry] = None
+
+    @property
+    def is_archived(self) -> bool:
+        return self.res_entry is not None
+
+    @property
+    def size(self) -> int:
+        if self.res_entry is not None:
+            return self.res_entry.size
+        return self.source.stat().st_size
+
+    def open(self) -> Buffer:
+        if self.res_entry is not None:
+            return self.res_entry.open()
+        return MappedBuffer(self.source)
+
+
+class VirtualFileSystem:
+    """Single case-insensitive namespace over loose files and the contents of RES archives.
+
+    Archive entries are mounted in the directory of their archive, with the LOCAL: prefix stripped.
+    Later archives (in path order) override earlier ones, and loose files override archive entries
+    unless `loose_files_first` is False.
+    """
+
+    def __init__(self, content_manager: ContentManager, loose_files_first: bool = True):
+        self._content_manager = content_manager
+        self._loose_files_first = loose_files_first
+        self._entries: dict[str, VfsEntry] = {}
+        self._directories: dict[str, set[str]] = {}
+        # File name -> full paths, for resolving references that carry no directory (e.g. MTP texture names).
+        self._file_names: dict[str, list[str]] = {}
+        self.rebuild()
+
+    @property
+    def content_manager(self) -> ContentManager:
+        return self._content_manager
+
+    def rebuild(self):
+        self._entries.clear()
+        self._directories = {"": set()}
+        self._file_names = {}
+        if self._loose_files_first:
+            self._mount_archives()
+            self._mount_loose_files()
+        else:
+            self._mount_loose_files()
+            self._mount_archives()
+
+    def _mount_archives(self):
+        base_path = self._content_manager.base_path
+        for record in sorted(self._content_manager.res_records, key=lambda r: r.path):
+            self.mount_archive(record.path.parent.relative_to(base_path), record.path, record.res)
+
+    def _mount_loose_files(self):
+        base_path = self._content_manager.base_path
+        for root, _, files in os.walk(base_path):
+            root = Path(root)
+            relative_root = root.relative_to(base_path)
+            for file_name in files:
+                self._add(VfsEntry(normalize_path(relative_root / file_name), root / file_name))
+
+    def mount_archive(self, mount_point: Union[str, Path], res_path: Path, archive: ResArchive):
+        mount_point = normalize_path(mount_point)
+        for entry in archive.files:
+            path = normalize_res_name(entry.name)
+            self._add(VfsEntry(normalize_path(posixpath.join(mount_point, path)), res_path, entry))
+
+    def _add(self, entry: VfsEntry):
+        path = entry.path
+        if path not in self._entries:
+            self._file_names.setdefault(path.rpartition("/")[2], []).append(path)
+        self._entries[path] = entry
+        while path:
+            parent, _, name = path.rpartition("/")
+            children = self._directories.get(parent)
+            if children is None:
+                children = self._directories[parent] = set()
+            elif name in children:
+                break
+            children.add(name)
+            path = parent
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return normalize_path(path) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_entry(self, path: Union[str, Path]) -> Optional[VfsEntry]:
+        return self._entries.get(normalize_path(path))
+
+    def exists(self, path: Union[str, Path]) -> bool:
+        path = normalize_path(path)
+        return path in self._entries or path in self._directories
+
+    def is_dir(self, path: Union[str, Path]) -> bool:
+        return normalize_path(path) in self._directories
+
+    def open(self, path: Union[str, Path]) -> Buffer:
+        entry = self._entries.get(normalize_path(path))
+        if entry is None:
+            raise FileNotFoundError(f"{path} not found")
+        return entry.open()
+
+    def listdir(self, path: Union[str, Path] = "") -> list[str]:
+        children = self._directories.get(normalize_path(path))
+        if children is None:
+            raise FileNotFoundError(f"Directory {path} not found")
+        return sorted(children)
+
+    def find_file_name(self, file_name: str) -> list[str]:
+        """Returns the paths of all files named `file_name`, in any directory."""
+        return list(self._file_names.get(normalize_path(file_name).rpartition("/")[2], ()))
+
+    def glob(self, pattern: str) -> list[str]:
+        """Returns all file paths matching an fnmatch pattern, `*` also matches across directories."""
+        pattern = normalize_path(pattern)
+        return sorted(path for path in self._entries if fnmatch.fnmatchcase(path, pattern))